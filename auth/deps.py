@@ -1,55 +1,85 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, Header, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-import os
-from appwrite_client import tablesDB, _safe_get
+from auth.jwt import decode_access_token
+from db.users import users as users_repo
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-SECRET = os.getenv("JWT_SECRET")
-ALGO = os.getenv("JWT_ALGORITHM", "HS256")
-DATABASE_ID = os.getenv("DATABASE_ID")
-USERS_COLLECTION_ID = os.getenv("USERS_COLLECTION_ID")
 
-def get_current_user(
+def _claims(token: str) -> dict:
+    payload = decode_access_token(token)
+    if not payload.get("userId"):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    return payload
+
+
+def get_token_claims(
     credentials: HTTPAuthorizationCredentials = Depends(security)
-):
-    token = credentials.credentials
+) -> dict:
+    """
+    Verified JWT claims (userId, email, role) without touching Appwrite.
+    Use this on hot paths that don't need the full user row.
+    """
+    return _claims(credentials.credentials)
+
+
+def get_optional_claims(
+    credentials: HTTPAuthorizationCredentials | None = Depends(optional_security)
+) -> dict | None:
+    """
+    Claims for routes that also serve guests; a missing or bad token is a guest.
+    """
+    if not credentials:
+        return None
+
     try:
-        payload = jwt.decode(token, SECRET, algorithms=[ALGO])
-        user_id = payload.get("userId")  # ✅ FIXED
+        return _claims(credentials.credentials)
+    except HTTPException:
+        return None
 
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
 
-        user_doc = tablesDB.get_row(
-            database_id=DATABASE_ID,
-            table_id=USERS_COLLECTION_ID,
-            row_id=user_id
-        )
-        return user_doc
+def get_token_or_query_claims(
+    token: str | None = None,
+    authorization: str | None = Header(None)
+) -> dict:
+    """
+    Claims from `Authorization: Bearer ...` or the legacy `?token=` parameter.
+    """
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
 
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    except Exception as e:
-        print("USER FETCH ERROR:", e)
-        raise HTTPException(status_code=500, detail="Failed to fetch user")
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
 
+    return _claims(token)
 
-def get_user_from_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET, algorithms=[ALGO])
-        user_id = payload.get("userId")  # ✅ FIXED
 
-        if not user_id:
-            return None
+def require_admin(
+    claims: dict = Depends(get_token_claims)
+) -> dict:
+    """
+    Claims of an admin token; the role is issued at login, so no user lookup.
+    """
+    if (claims.get("role") or "").strip().lower() != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return claims
+
+
+async def get_current_user(
+    claims: dict = Depends(get_token_claims)
+):
+    try:
+        user_doc = await users_repo.get(claims["userId"])
+        if not user_doc:
+            raise HTTPException(status_code=401, detail="Invalid token")
 
-        return databases.get_document(
-            DATABASE_ID,
-            USERS_COLLECTION_ID,
-            user_id
-        )
+        return user_doc
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print("TOKEN ERROR:", e)
-        return None
+        print("USER FETCH ERROR:", e)
+        raise HTTPException(status_code=500, detail="Failed to fetch user")
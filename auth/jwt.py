@@ -1,27 +1,104 @@
-from datetime import datetime, timedelta
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
-import os
+from auth.revocation import revoked_sessions
+from utils.cache import TTLCache
 
-SECRET_KEY = os.getenv("JWT_SECRET", "supersecretkey")
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
 
 
-def create_access_token(data: dict):
+@dataclass(frozen=True)
+class JWTSettings:
+    secret: str
+    algorithm: str
+    cache_size: int
+    cache_ttl: float
+
+
+@lru_cache
+def get_jwt_settings() -> JWTSettings:
+    """
+    Read JWT config once; called at startup so every route shares it.
+    """
+    return JWTSettings(
+        secret=os.getenv("JWT_SECRET", "supersecret"),
+        algorithm=os.getenv("JWT_ALGORITHM", "HS256"),
+        cache_size=int(os.getenv("JWT_CACHE_SIZE", "4096")),
+        cache_ttl=float(os.getenv("JWT_CACHE_TTL", "300")),
+    )
+
+
+_token_cache: TTLCache | None = None
+
+
+def _get_token_cache() -> TTLCache:
+    global _token_cache
+    if _token_cache is None:
+        settings = get_jwt_settings()
+        _token_cache = TTLCache(maxsize=settings.cache_size, ttl=settings.cache_ttl)
+    return _token_cache
+
+
+def create_access_token(data: dict, expires_delta: int = ACCESS_TOKEN_EXPIRE_MINUTES) -> str:
+    settings = get_jwt_settings()
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.now(timezone.utc) + timedelta(minutes=expires_delta)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return jwt.encode(to_encode, settings.secret, algorithm=settings.algorithm)
 
 
-def verify_token(token: str):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+def decode_access_token(token: str) -> dict:
+    """
+    Verify a token and return its payload.
+    Verified payloads are cached by token digest until the earlier of the
+    cache TTL and the token's own `exp`, so repeat requests skip HMAC + JSON work.
+    Tokens of a revoked session (`sid` claim) are rejected, cached or not.
+    """
+    cache = _get_token_cache()
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    payload = cache.get(key)
+    if payload is not None:
+        _check_session(payload)
         return payload
+
+    settings = get_jwt_settings()
+    try:
+        payload = jwt.decode(token, settings.secret, algorithms=[settings.algorithm])
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
+
+    ttl = settings.cache_ttl
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+
+    if ttl > 0:
+        cache.set(key, payload, ttl=ttl)
+    _check_session(payload)
+    return payload
+
+
+def _check_session(payload: dict):
+    sid = payload.get("sid")
+    if sid and sid in revoked_sessions:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session revoked",
+        )
+
+
+# Kept for callers of the old auth.jwt API
+verify_token = decode_access_token
+
+
+def token_cache_stats() -> dict:
+    return _get_token_cache().stats()
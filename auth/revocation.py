@@ -0,0 +1,37 @@
+import time
+
+
+class RevocationSet:
+    """
+    Session ids whose access tokens must be rejected, each kept only until
+    the last access token issued for it has expired. Checking it is a dict
+    lookup, so token validation stays a pure CPU check.
+
+    Per process: a revocation reaches other workers and hosts only through
+    SessionManager's periodic sync of the sessions table.
+    """
+
+    def __init__(self):
+        self._revoked: dict[str, float] = {}
+
+    def add(self, session_id: str, until: float):
+        self._revoked[session_id] = max(until, self._revoked.get(session_id, 0.0))
+
+    def merge(self, revoked: dict[str, float]):
+        """
+        Fold in the periodically synced revocations and drop expired entries.
+        """
+        for session_id, until in revoked.items():
+            self.add(session_id, until)
+        now = time.time()
+        self._revoked = {sid: until for sid, until in self._revoked.items() if until > now}
+
+    def __contains__(self, session_id: str) -> bool:
+        until = self._revoked.get(session_id)
+        return until is not None and until > time.time()
+
+    def __len__(self):
+        return len(self._revoked)
+
+
+revoked_sessions = RevocationSet()
@@ -0,0 +1,219 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from appwrite.query import Query
+from auth.jwt import get_jwt_settings
+from auth.revocation import revoked_sessions
+from db.sessions import sessions as sessions_repo
+
+ACCESS_TOKEN_TTL_MINUTES = int(os.getenv("ACCESS_TOKEN_TTL_MINUTES", "15"))
+# Idle lifetime: each refresh pushes the session's expiry this far out again
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# How often each worker pulls revocations made by other workers
+REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", "10"))
+# Seconds the just-rotated refresh token keeps working (two tabs refreshing at once)
+REFRESH_REUSE_GRACE = float(os.getenv("REFRESH_REUSE_GRACE", "30"))
+
+
+class InvalidRefreshToken(Exception):
+    pass
+
+
+def _now_iso(delta: timedelta = timedelta()) -> str:
+    return (datetime.now(timezone.utc) + delta).isoformat(timespec="milliseconds")
+
+
+def _hash(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def _next_secret(session_id: str, secret: str) -> str:
+    """
+    The secret that replaces `secret` on rotation. Derived rather than
+    random, so concurrent refreshes with the same token (other tabs, other
+    workers) all get the same new token instead of invalidating each other.
+    """
+    key = get_jwt_settings().secret.encode()
+    digest = hmac.new(key, f"refresh:{session_id}.{secret}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def _split(refresh_token: str) -> tuple[str, str]:
+    session_id, _, secret = (refresh_token or "").partition(".")
+    if not session_id or not secret:
+        raise InvalidRefreshToken()
+    return session_id, secret
+
+
+class SessionManager:
+    """
+    Refresh tokens for short-lived access tokens.
+
+    A refresh token is "<session id>.<secret>"; only the secret's SHA-256 is
+    stored, in the sessions table. Every refresh rotates the secret. The
+    token rotated away last stays valid for `reuse_grace` seconds and is
+    answered with the same new token, so simultaneous refreshes from two
+    tabs or two workers don't look like theft. Any older token means it
+    leaked, so the whole session is revoked.
+
+    Access tokens carry the session id as `sid`. Revoked sessions go into
+    revoked_sessions right away in this worker; other workers and hosts
+    pick them up within REVOCATION_SYNC_INTERVAL, so a logged-out access
+    token can keep working there for up to that long (and never past its
+    own ACCESS_TOKEN_TTL_MINUTES).
+    """
+
+    def __init__(self, access_ttl_minutes: int, refresh_days: int, sync_interval: float, reuse_grace: float):
+        self.access_ttl_minutes = access_ttl_minutes
+        self.refresh_days = refresh_days
+        self.sync_interval = sync_interval
+        self.reuse_grace = reuse_grace
+        # session id -> [lock, users]; saves a second Appwrite write when one worker races itself
+        self._locks: dict[str, list] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(sessions_repo.table_id)
+
+    @property
+    def access_ttl(self) -> int:
+        return self.access_ttl_minutes * 60
+
+    # ================= LIFECYCLE =================
+
+    async def start(self):
+        if not self.enabled:
+            print("SESSIONS: SESSIONS_COLLECTION_ID not set, issuing 24h access tokens without refresh")
+            return
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                await self.sync_revocations()
+            except Exception as e:
+                print("REVOCATION SYNC ERROR:", e)
+            await asyncio.sleep(self.sync_interval)
+
+    async def sync_revocations(self) -> int:
+        """
+        Load sessions revoked recently enough to still have live access tokens.
+        """
+        cutoff = _now_iso(-timedelta(seconds=self.access_ttl))
+        revoked = {}
+        async for page in sessions_repo.iter_pages(
+            Query.greater_than_equal("revokedAt", cutoff),
+            Query.select(["revokedAt"]),
+            page_size=500
+        ):
+            for session in page:
+                revoked_at = datetime.fromisoformat(session.revoked_at).timestamp()
+                revoked[session.id] = revoked_at + self.access_ttl
+
+        revoked_sessions.merge(revoked)
+        return len(revoked)
+
+    # ================= TOKENS =================
+
+    async def create(self, user_id: str) -> tuple[str, str]:
+        """
+        Start a session at login. Returns (session id, refresh token).
+        """
+        session_id = str(uuid.uuid4())
+        secret = secrets.token_urlsafe(32)
+        await sessions_repo.create(session_id, {
+            "userId": user_id,
+            "tokenHash": _hash(secret),
+            "expiresAt": _now_iso(timedelta(days=self.refresh_days)),
+            "revokedAt": None,
+        })
+        return session_id, f"{session_id}.{secret}"
+
+    async def rotate(self, refresh_token: str) -> tuple[str, str, str]:
+        """
+        Exchange a refresh token for a new one.
+        Returns (session id, user id, new refresh token); raises InvalidRefreshToken.
+        """
+        session_id, secret = _split(refresh_token)
+
+        entry = self._locks.setdefault(session_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                return await self._rotate(session_id, secret)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[session_id]
+
+    async def _rotate(self, session_id: str, secret: str) -> tuple[str, str, str]:
+        session = await sessions_repo.get(session_id)
+        if session is None or session.revoked_at or not session.expires_at:
+            raise InvalidRefreshToken()
+        if datetime.fromisoformat(session.expires_at) < datetime.now(timezone.utc):
+            raise InvalidRefreshToken()
+
+        presented = _hash(secret)
+        new_secret = _next_secret(session_id, secret)
+        if hmac.compare_digest(session.token_hash or "", presented):
+            await sessions_repo.update(session_id, {
+                "tokenHash": _hash(new_secret),
+                "previousHash": presented,
+                "rotatedAt": _now_iso(),
+                "expiresAt": _now_iso(timedelta(days=self.refresh_days)),
+            })
+        elif not self._in_grace(session, presented, new_secret):
+            print("REFRESH TOKEN REUSE: revoking session", session_id)
+            await self.revoke_session(session_id)
+            raise InvalidRefreshToken()
+
+        return session_id, session.user_id, f"{session_id}.{new_secret}"
+
+    def _in_grace(self, session, presented: str, new_secret: str) -> bool:
+        """
+        `presented` is the token rotated away last, recently enough, and the
+        current one is what rotating it produced.
+        """
+        if not session.previous_hash or not session.rotated_at:
+            return False
+        if not hmac.compare_digest(session.previous_hash, presented):
+            return False
+        if not hmac.compare_digest(session.token_hash or "", _hash(new_secret)):
+            return False
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(session.rotated_at)
+        return age.total_seconds() <= self.reuse_grace
+
+    async def revoke_session(self, session_id: str):
+        revoked_sessions.add(session_id, time.time() + self.access_ttl)
+        await sessions_repo.update(session_id, {"revokedAt": _now_iso()})
+
+    async def revoke(self, refresh_token: str):
+        """
+        Logout: end the session if the token is its current or previous one
+        (a tab that lost a refresh race still holds the previous one).
+        """
+        session_id, secret = _split(refresh_token)
+        session = await sessions_repo.get(session_id)
+        if session is None or session.revoked_at:
+            return
+        presented = _hash(secret)
+        if any(hmac.compare_digest(known or "", presented) for known in (session.token_hash, session.previous_hash)):
+            await self.revoke_session(session_id)
+
+
+session_manager = SessionManager(
+    ACCESS_TOKEN_TTL_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS, REVOCATION_SYNC_INTERVAL, REFRESH_REUSE_GRACE
+)
@@ -0,0 +1,139 @@
+"""
+Per-request CPU for building the /user/current body for a user with N orders.
+
+before: SDK RowList/Row models + the old appwrite_client._safe_get probing
+after:  one-time Order/User record conversion + plain attribute access
+
+    python -m bench.current_user_cpu [orders] [iterations]
+"""
+import sys
+import time
+from appwrite.models.row_list import RowList
+from db.records import Order, User
+from services.order_history import ORDER_FIELDS, SUMMARY_FIELDS
+
+
+def _legacy_safe_get(data, key, default=None):
+    # Verbatim behaviour of the removed appwrite_client._safe_get
+    if data is None:
+        return default
+    if isinstance(data, dict):
+        if key == 'id' and 'id' not in data and '$id' in data:
+            return data.get('$id')
+        if key == '$id' and '$id' not in data and 'id' in data:
+            return data.get('id')
+        if key == 'documents' and 'documents' not in data and 'rows' in data:
+            return data.get('rows')
+        if key == 'rows' and 'rows' not in data and 'documents' in data:
+            return data.get('documents')
+        return data.get(key, default)
+    row_data = getattr(data, 'data', None)
+    if isinstance(row_data, dict):
+        if key == '$id':
+            val = row_data.get('$id') or getattr(data, 'id', None)
+            return val if val is not None else default
+        if key in row_data:
+            return row_data[key]
+        top_val = getattr(data, key, None)
+        return top_val if top_val is not None else default
+    val = getattr(data, key, None)
+    if val is None:
+        if key == 'documents': val = getattr(data, 'rows', None)
+        elif key == 'rows': val = getattr(data, 'documents', None)
+        elif key == 'id': val = getattr(data, '$id', None)
+        elif key == '$id': val = getattr(data, 'id', None)
+    return val if val is not None else default
+
+
+def _system(row_id: str) -> dict:
+    return {
+        "$id": row_id,
+        "$sequence": 1,
+        "$tableId": "t",
+        "$databaseId": "d",
+        "$createdAt": "2026-01-01T00:00:00.000+00:00",
+        "$updatedAt": "2026-01-01T00:00:00.000+00:00",
+        "$permissions": [],
+    }
+
+
+def make_payloads(n_orders: int):
+    user = {**_system("user-1"), "name": "Bench", "email": "b@example.com", "mobile": "1", "role": "user", "passwordHash": "x"}
+    orders = [
+        {
+            **_system(f"order-{i}"),
+            "email": "b@example.com", "isGuest": False, "userId": "user-1", "name": "Bench",
+            "country": "IN", "state": "MH", "city": "Pune", "street": "1 Road", "pincode": "411001",
+            "phone": "1", "paymentMethod": "COD", "total": 499.0, "status": "Pending",
+            "items": [{"id": f"p{j}", "name": "Item", "qty": 1, "price": 99.8} for j in range(5)],
+        }
+        for i in range(n_orders)
+    ]
+    return {"total": 1, "rows": [user]}, {"total": n_orders, "rows": orders}
+
+
+def before(users_payload, orders_payload):
+    users = RowList.with_data(users_payload)
+    user = (_legacy_safe_get(users, "rows") or _legacy_safe_get(users, "documents") or [])[0]
+    orders_resp = RowList.with_data(orders_payload)
+    order_rows = _legacy_safe_get(orders_resp, "rows") or _legacy_safe_get(orders_resp, "documents") or []
+    return {
+        "status": "user",
+        "user": {
+            "id": _legacy_safe_get(user, "$id"),
+            "name": _legacy_safe_get(user, "name", "User"),
+            "email": _legacy_safe_get(user, "email", ""),
+            "mobile": _legacy_safe_get(user, "mobile", ""),
+            "role": _legacy_safe_get(user, "role", "user"),
+        },
+        "orders": [
+            {
+                "id": _legacy_safe_get(o, "$id"),
+                "items": _legacy_safe_get(o, "items", []),
+                "total": _legacy_safe_get(o, "total", 0),
+                "status": _legacy_safe_get(o, "status", "Pending"),
+            }
+            for o in order_rows
+        ],
+    }
+
+
+def after(users_payload, orders_payload):
+    user = User.from_row(users_payload["rows"][0])
+    attrs = [(f, ORDER_FIELDS[f]) for f in SUMMARY_FIELDS]
+    orders = [Order.from_row(row) for row in orders_payload["rows"]]
+    return {
+        "status": "user",
+        "user": {
+            "id": user.id,
+            "name": user.name or "User",
+            "email": user.email or "",
+            "mobile": user.mobile or "",
+            "role": user.role or "user",
+        },
+        "orders": [{f: getattr(o, attr) for f, attr in attrs} for o in orders],
+    }
+
+
+def cpu_per_call(fn, args, iterations: int) -> float:
+    fn(*args)
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(*args)
+    return (time.process_time() - start) / iterations
+
+
+def main(n_orders: int = 200, iterations: int = 200):
+    payloads = make_payloads(n_orders)
+    assert before(*payloads) == after(*payloads)
+
+    b = cpu_per_call(before, payloads, iterations)
+    a = cpu_per_call(after, payloads, iterations)
+    print(f"/user/current body, {n_orders} orders")
+    print(f"  before (RowList + _safe_get): {b * 1e3:7.3f} ms CPU/request")
+    print(f"  after  (slots records):       {a * 1e3:7.3f} ms CPU/request  ({b / a:.1f}x)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
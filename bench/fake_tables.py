@@ -0,0 +1,131 @@
+import asyncio
+import itertools
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from appwrite.exception import AppwriteException
+
+
+class FakeTablesDB:
+    """
+    In-process stand-in for db.client.AsyncTablesDB.
+
+    Implements list_rows / get_row / create_row / update_row / delete_row over plain
+    dicts and understands the Query methods the app uses (equal, select,
+    limit, cursorAfter, orderAsc/orderDesc, comparisons). Every call sleeps
+    for `latency` seconds plus uniform `jitter`, to mimic the network.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tables: dict[str, dict[str, dict]] = {}
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._clock = itertools.count()
+
+    # ================= HELPERS =================
+
+    async def _delay(self):
+        self.calls += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+
+    def _table(self, table_id: str) -> dict[str, dict]:
+        return self.tables.setdefault(table_id, {})
+
+    def _timestamp(self) -> str:
+        moment = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(milliseconds=next(self._clock))
+        return moment.isoformat(timespec="milliseconds")
+
+    def seed(self, table_id: str, row_id: str, data: dict) -> dict:
+        ts = self._timestamp()
+        row = {"$id": row_id, "$createdAt": ts, "$updatedAt": ts, **data}
+        self._table(table_id)[row_id] = row
+        return row
+
+    @staticmethod
+    def _filter(rows: list[dict], query: dict) -> list[dict]:
+        method, attr, values = query["method"], query.get("attribute"), query.get("values", [])
+        if method == "equal":
+            return [r for r in rows if r.get(attr) in values]
+        if method == "notEqual":
+            return [r for r in rows if r.get(attr) not in values]
+        if method == "greaterThan":
+            return [r for r in rows if r.get(attr) is not None and r[attr] > values[0]]
+        if method == "greaterThanEqual":
+            return [r for r in rows if r.get(attr) is not None and r[attr] >= values[0]]
+        if method == "lessThan":
+            return [r for r in rows if r.get(attr) is not None and r[attr] < values[0]]
+        if method == "lessThanEqual":
+            return [r for r in rows if r.get(attr) is not None and r[attr] <= values[0]]
+        if method == "between":
+            return [r for r in rows if r.get(attr) is not None and values[0] <= r[attr] <= values[1]]
+        return rows
+
+    # ================= TablesDB API =================
+
+    async def list_rows(self, database_id: str, table_id: str, queries: list[str] | None = None) -> dict:
+        await self._delay()
+        parsed = [json.loads(q) for q in queries or []]
+        rows = list(self._table(table_id).values())
+        limit, select, cursor = 25, None, None
+        order = []
+
+        for q in parsed:
+            method = q["method"]
+            if method == "limit":
+                limit = q["values"][0]
+            elif method == "select":
+                select = q["values"]
+            elif method == "cursorAfter":
+                cursor = q["values"][0]
+            elif method in ("orderAsc", "orderDesc"):
+                order.append((q["attribute"], method == "orderDesc"))
+            else:
+                rows = self._filter(rows, q)
+
+        for attr, desc in reversed(order):
+            rows.sort(key=lambda r: (r.get(attr) is None, r.get(attr)), reverse=desc)
+
+        total = len(rows)
+        if cursor:
+            ids = [r["$id"] for r in rows]
+            rows = rows[ids.index(cursor) + 1:] if cursor in ids else []
+        rows = rows[:limit]
+        if select:
+            rows = [{k: v for k, v in r.items() if k.startswith("$") or k in select} for r in rows]
+
+        return {"total": total, "rows": [dict(r) for r in rows]}
+
+    async def get_row(self, database_id: str, table_id: str, row_id: str) -> dict:
+        await self._delay()
+        row = self._table(table_id).get(row_id)
+        if row is None:
+            raise AppwriteException("Row not found", 404, "row_not_found")
+        return dict(row)
+
+    async def create_row(self, database_id: str, table_id: str, row_id: str, data: dict, permissions: list[str] | None = None) -> dict:
+        await self._delay()
+        if row_id in self._table(table_id):
+            raise AppwriteException("Row already exists", 409, "row_already_exists")
+        return dict(self.seed(table_id, row_id, data))
+
+    async def update_row(self, database_id: str, table_id: str, row_id: str, data: dict) -> dict:
+        await self._delay()
+        row = self._table(table_id).get(row_id)
+        if row is None:
+            raise AppwriteException("Row not found", 404, "row_not_found")
+        row.update(data)
+        row["$updatedAt"] = self._timestamp()
+        return dict(row)
+
+    async def delete_row(self, database_id: str, table_id: str, row_id: str):
+        await self._delay()
+        self._table(table_id).pop(row_id, None)
+
+    async def aclose(self):
+        pass
@@ -0,0 +1,293 @@
+"""
+Load-test harness: drives the real FastAPI app from main.py in-process
+against bench.fake_tables.FakeTablesDB with injected latency.
+
+    python -m bench.harness                          # all scenarios
+    python -m bench.harness profile_loads --latency 0.03 --jitter 0.02
+    python -m bench.harness --save                   # write bench/baselines/*.json
+    python -m bench.harness --compare                # diff against saved baselines
+
+--compare exits non-zero when any route's p95 regresses by more than
+--threshold (default 20%) against its baseline, or its error rate
+(4xx/5xx, e.g. 503 load shedding) rises by more than that many points.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("APPWRITE_ENDPOINT", "http://appwrite.invalid/v1")
+os.environ.setdefault("APPWRITE_PROJECT_ID", "bench")
+os.environ.setdefault("APPWRITE_API_KEY", "bench")
+os.environ.setdefault("DATABASE_ID", "bench")
+os.environ.setdefault("USERS_COLLECTION_ID", "users")
+os.environ.setdefault("ORDERS_COLLECTION_ID", "orders")
+os.environ.setdefault("EMAIL_INDEX_COLLECTION_ID", "email_index")
+os.environ.setdefault("PRODUCTS_COLLECTION_ID", "products")
+os.environ.setdefault("SESSIONS_COLLECTION_ID", "sessions")
+os.environ.setdefault("JWT_SECRET", "bench-secret")
+# Every simulated client shares one IP; keep throttling out of the latency numbers
+os.environ.setdefault("LOGIN_RATE_LIMIT_IP", "1000000/1")
+os.environ.setdefault("LOGIN_RATE_LIMIT_EMAIL", "1000000/1")
+# login_storm measures the login route, not bcrypt admission control: cheap
+# hashes, and a hash queue deep enough for --concurrency, so nothing is shed
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("PASSWORD_HASH_MAX_PENDING", "1000")
+BENCH_DIR = tempfile.mkdtemp(prefix="bench-")
+os.environ.setdefault("ORDER_SPOOL_PATH", os.path.join(BENCH_DIR, "spool.sqlite3"))
+os.environ.setdefault("ORDER_ANALYTICS_PATH", os.path.join(BENCH_DIR, "analytics.sqlite3"))
+os.environ.setdefault("READ_MIRROR_PATH", os.path.join(BENCH_DIR, "read_mirror.sqlite3"))
+os.environ.setdefault("ORDER_IMPORT_PATH", os.path.join(BENCH_DIR, "imports.sqlite3"))
+os.environ.setdefault("ORDER_EVENTS_PATH", os.path.join(BENCH_DIR, "order_events.sqlite3"))
+os.environ.setdefault("RESPONSE_CACHE_PATH", os.path.join(BENCH_DIR, "response_cache.sqlite3"))
+
+import httpx  # noqa: E402
+from bench.fake_tables import FakeTablesDB  # noqa: E402
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+PASSWORD = "bench-password"
+PRODUCTS = 50
+
+
+# ================= SETUP =================
+
+def install(fake: FakeTablesDB):
+    """
+    Make the fake the shared data client and reset in-process caches.
+    """
+    from db.client import set_tables_db
+    from db.resilience import ResilientTablesDB
+    from db.users import users
+    from db.email_index import email_index
+    from utils.response_cache import response_cache
+
+    set_tables_db(ResilientTablesDB(fake))
+    users.cache.clear()
+    email_index.positive.clear()
+    email_index.negative.clear()
+    response_cache.entries.clear()
+
+
+async def warm_hash_pool():
+    """
+    Start every bcrypt pool process before measuring; spawning them is
+    worker start-up cost, not login latency.
+    """
+    from utils.pwd import HASH_WORKERS, hash_password, verify_and_update_async
+
+    password_hash = hash_password(PASSWORD)
+    await asyncio.gather(*(verify_and_update_async(PASSWORD, password_hash) for _ in range(HASH_WORKERS)))
+
+
+def seed(fake: FakeTablesDB, n_users: int, orders_per_user: int) -> list[dict]:
+    from auth.jwt import create_access_token
+    from db.users import users as users_repo
+    from db.orders import orders as orders_repo
+    from db.email_index import email_index, email_row_id
+    from db.products import products as products_repo
+    from utils.pwd import hash_password
+
+    password_hash = hash_password(PASSWORD)
+    for k in range(PRODUCTS):
+        fake.seed(products_repo.table_id, f"sku-{k}", {"name": f"Item {k}", "price": 99.0, "isActive": True})
+
+    users = []
+    for i in range(n_users):
+        user_id = f"user-{i}"
+        email = f"user{i}@bench-mail.com"
+        fake.seed(users_repo.table_id, user_id, {
+            "name": f"User {i}", "email": email, "mobile": str(9000000000 + i),
+            "passwordHash": password_hash, "role": "user",
+        })
+        fake.seed(email_index.table_id, email_row_id(email), {"email": email, "userId": user_id})
+        for j in range(orders_per_user):
+            fake.seed(orders_repo.table_id, f"order-{i}-{j}", _order_data(email, user_id, j))
+        token = create_access_token({"userId": user_id, "email": email, "role": "user"})
+        users.append({"id": user_id, "email": email, "token": token})
+    return users
+
+
+def _order_data(email: str, user_id: str | None, n: int) -> dict:
+    return {
+        "email": email, "isGuest": user_id is None, "userId": user_id, "name": "Bench Buyer",
+        "country": "India", "state": "Maharashtra", "city": "Pune", "street": f"{n} Bench Road",
+        "pincode": "411001", "phone": "9000000000", "paymentMethod": "COD",
+        "items": [{"id": f"sku-{k}", "name": "Item", "qty": 1, "price": 99.0} for k in range(3)],
+        "total": 297.0, "status": "Pending",
+    }
+
+
+# ================= SCENARIOS =================
+
+def login_storm(users: list[dict], n: int):
+    for i in range(n):
+        user = users[i % len(users)]
+        yield "POST /auth/login", "POST", "/auth/login", {"json": {"email": user["email"], "password": PASSWORD}}
+
+
+def checkout_burst(users: list[dict], n: int):
+    for i in range(n):
+        user = users[i % len(users)]
+        body = _order_data(user["email"], None, i)
+        body["address"] = {k: body.pop(k) for k in ("country", "state", "city", "street", "pincode")}
+        headers = {"Idempotency-Key": str(uuid.uuid4())}
+        if i % 2 == 0:
+            headers["Authorization"] = f"Bearer {user['token']}"
+        yield "POST /orders/", "POST", "/orders/", {"json": body, "headers": headers}
+
+
+def profile_loads(users: list[dict], n: int):
+    for i in range(n):
+        user = users[i % len(users)]
+        auth = {"Authorization": f"Bearer {user['token']}"}
+        kind = i % 3
+        if kind == 0:
+            yield "GET /profile/", "GET", "/profile/", {"headers": auth}
+        elif kind == 1:
+            yield "GET /user/current", "GET", "/user/current", {"headers": {"Cookie": f"user_id={user['id']}"}}
+        else:
+            yield "GET /auth/my-orders", "GET", "/auth/my-orders", {"headers": auth}
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "checkout_burst": checkout_burst,
+    "profile_loads": profile_loads,
+}
+
+
+# ================= RUNNER =================
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+async def run_scenario(app, name: str, users: list[dict], n: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: dict[str, list[tuple[float, int]]] = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(label, method, path, kwargs):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.request(method, path, **kwargs)
+                elapsed = time.perf_counter() - start
+            samples.setdefault(label, []).append((elapsed, response.status_code))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(*spec) for spec in SCENARIOS[name](users, n)))
+        wall = time.perf_counter() - started
+
+    routes = {}
+    for label, values in samples.items():
+        latencies = sorted(v for v, _ in values)
+        statuses: dict[str, int] = {}
+        for _, status in values:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        routes[label] = {
+            "requests": len(values),
+            "statuses": dict(sorted(statuses.items())),
+            "errors": sum(1 for _, status in values if status >= 400),
+            "throughput_rps": round(len(values) / wall, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
+    return {"wall_seconds": round(wall, 3), "routes": routes}
+
+
+def print_report(name: str, result: dict, baseline: dict | None):
+    print(f"\n== {name} ({result['wall_seconds']}s)")
+    print(f"{'route':<22}{'reqs':>6}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}  {'vs base p95':<12}statuses")
+    for label, r in result["routes"].items():
+        delta = ""
+        base = (baseline or {}).get("routes", {}).get(label)
+        if base and base["p95_ms"]:
+            delta = f"{(r['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100:+.1f}%"
+        print(f"{label:<22}{r['requests']:>6}{r['errors']:>5}{r['throughput_rps']:>9}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}  {delta:<12}"
+              + " ".join(f"{code}x{count}" for code, count in r["statuses"].items()))
+
+
+def regressions(result: dict, baseline: dict, threshold: float) -> list[str]:
+    found = []
+    for label, r in result["routes"].items():
+        base = baseline.get("routes", {}).get(label)
+        if not base:
+            continue
+        if base["p95_ms"] and r["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            found.append(f"{label}: p95 {base['p95_ms']}ms -> {r['p95_ms']}ms")
+        base_rate = base["errors"] / base["requests"]
+        rate = r["errors"] / r["requests"]
+        if rate > base_rate + threshold:
+            found.append(f"{label}: error rate {base_rate:.0%} -> {rate:.0%}")
+    return found
+
+
+async def main(args) -> int:
+    import main as app_module
+
+    config = {
+        "latency": args.latency, "jitter": args.jitter, "requests": args.requests,
+        "concurrency": args.concurrency, "users": args.users, "orders_per_user": args.orders,
+    }
+    failures = []
+
+    for name in args.scenarios or list(SCENARIOS):
+        fake = FakeTablesDB(latency=args.latency, jitter=args.jitter)
+        install(fake)
+        users = seed(fake, args.users, args.orders)
+
+        async with app_module.app.router.lifespan_context(app_module.app):
+            if name == "login_storm":
+                await warm_hash_pool()
+            result = await run_scenario(app_module.app, name, users, args.requests, args.concurrency)
+        result = {"scenario": name, "config": config, **result}
+
+        path = BASELINE_DIR / f"{name}.json"
+        baseline = json.loads(path.read_text()) if path.exists() else None
+        print_report(name, result, baseline)
+
+        if args.compare and baseline:
+            failures += regressions(result, baseline, args.threshold)
+        if args.save:
+            BASELINE_DIR.mkdir(exist_ok=True)
+            path.write_text(json.dumps(result, indent=2) + "\n")
+            print(f"saved {path}")
+
+    if failures:
+        print("\nREGRESSIONS:\n  " + "\n  ".join(failures))
+        return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--latency", type=float, default=0.02, help="base Appwrite latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="extra uniform latency in seconds")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=20, help="seeded orders per user")
+    parser.add_argument("--save", action="store_true", help="write results as the new baselines")
+    parser.add_argument("--compare", action="store_true", help="fail on p95 regressions vs baselines")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
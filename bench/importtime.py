@@ -0,0 +1,72 @@
+"""
+Import-time budget for `main`, measured with `python -X importtime` in a
+fresh interpreter with no Appwrite credentials in the environment.
+
+    python -m bench.importtime                 # best of 5 runs vs the budget
+    python -m bench.importtime --budget 600 --top 20
+
+Exits non-zero when `import main` takes longer than --budget milliseconds
+(default: IMPORT_BUDGET_MS or 700). The top list shows the slowest imports
+by cumulative time, so a new heavy dependency is easy to spot.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure() -> list[tuple[str, int, int, int]]:
+    """
+    One cold `import main`: (module, self us, cumulative us, depth) per import.
+    """
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("APPWRITE_", "PYTHON"))}
+    env["PYTHONPATH"] = str(ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"import main failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            rows.append((module, int(own), int(cumulative), len(indent) // 2))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "700")))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    best = None
+    for _ in range(args.runs):
+        rows = measure()
+        total = next(cumulative for module, _, cumulative, _ in rows if module == "main")
+        if best is None or total < best[0]:
+            best = (total, rows)
+
+    total, rows = best
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for module, own, cumulative, depth in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{cumulative / 1000:>14.1f}{own / 1000:>10.1f}  {'  ' * depth}{module}")
+
+    print(f"\nimport main: {total / 1000:.1f}ms (best of {args.runs}), budget {args.budget:.0f}ms")
+    if total / 1000 > args.budget:
+        print("OVER BUDGET")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
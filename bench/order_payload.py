@@ -0,0 +1,92 @@
+"""
+Serialization CPU and wire bytes for an order-history body with N orders.
+
+before: dict returned from the route -> jsonable_encoder + JSONResponse (json.dumps),
+        or JSONResponse alone for bodies the response cache serialized itself
+after:  OrjsonResponse, then gzip / brotli as CompressionMiddleware applies them
+
+    python -m bench.order_payload [orders] [iterations]
+"""
+import gzip
+import json
+import random
+import sys
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from db.records import Order
+from services.order_history import FULL_FIELDS, ORDER_FIELDS
+from utils.compression import BROTLI_QUALITY, GZIP_LEVEL, brotli
+from utils.responses import OrjsonResponse
+from bench.current_user_cpu import make_payloads
+
+
+def make_body(n_orders: int) -> dict:
+    _, orders_payload = make_payloads(n_orders)
+    # Vary the values so compression ratios are not flattered by identical rows
+    rng = random.Random(0)
+    for i, row in enumerate(orders_payload["rows"]):
+        row["$createdAt"] = row["$updatedAt"] = f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T{rng.randrange(24):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}.{rng.randrange(1000):03d}+00:00"
+        row["street"] = f"{rng.randrange(1, 999)} Road {rng.randrange(10000)}"
+        row["pincode"] = str(rng.randrange(100000, 999999))
+        row["phone"] = str(rng.randrange(6000000000, 9999999999))
+        row["items"] = [
+            {"id": f"sku-{rng.randrange(500)}", "name": f"Item {rng.randrange(500)}", "qty": rng.randrange(1, 5), "price": rng.randrange(1000, 99999) / 100}
+            for _ in range(rng.randrange(1, 6))
+        ]
+        row["total"] = round(sum(item["qty"] * item["price"] for item in row["items"]), 2)
+    attrs = [(f, ORDER_FIELDS[f]) for f in FULL_FIELDS]
+    orders = [Order.from_row(row) for row in orders_payload["rows"]]
+    return {
+        "success": True,
+        "orders": [{f: getattr(o, attr) for f, attr in attrs} for o in orders],
+        "nextCursor": None,
+    }
+
+
+def before(body: dict) -> bytes:
+    return JSONResponse(jsonable_encoder(body)).body
+
+
+def before_cached(body: dict) -> bytes:
+    return JSONResponse(body).body
+
+
+def after(body: dict) -> bytes:
+    return OrjsonResponse(body).body
+
+
+def cpu_per_call(fn, arg, iterations: int) -> float:
+    fn(arg)
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.process_time() - start) / iterations
+
+
+def main(n_orders: int = 500, iterations: int = 50):
+    body = make_body(n_orders)
+    raw = after(body)
+    assert json.loads(before(body)) == json.loads(raw)
+
+    b = cpu_per_call(before, body, iterations)
+    c = cpu_per_call(before_cached, body, iterations)
+    a = cpu_per_call(after, body, iterations)
+    print(f"order history body, {n_orders} orders")
+    print(f"  before (jsonable_encoder + json): {b * 1e3:7.3f} ms CPU/request")
+    print(f"  before (json only, cached path):  {c * 1e3:7.3f} ms CPU/request")
+    print(f"  after  (orjson):                  {a * 1e3:7.3f} ms CPU/request  ({b / a:.1f}x / {c / a:.1f}x)")
+
+    print(f"  identity:  {len(raw):>8} bytes")
+    gz = cpu_per_call(lambda r: gzip.compress(r, GZIP_LEVEL), raw, iterations)
+    size = len(gzip.compress(raw, GZIP_LEVEL))
+    print(f"  gzip -{GZIP_LEVEL}:   {size:>8} bytes  ({len(raw) / size:.1f}x, {gz * 1e3:.3f} ms CPU)")
+    if brotli is not None:
+        br = cpu_per_call(lambda r: brotli.compress(r, quality=BROTLI_QUALITY), raw, iterations)
+        size = len(brotli.compress(raw, quality=BROTLI_QUALITY))
+        print(f"  br q{BROTLI_QUALITY}:     {size:>8} bytes  ({len(raw) / size:.1f}x, {br * 1e3:.3f} ms CPU)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,199 @@
+import httpx
+from appwrite.query import Query
+from appwrite.exception import AppwriteException
+from db.resilience import ResilientTablesDB
+from settings import get_settings
+from utils.metrics import timed_appwrite_call
+
+
+class AsyncTablesDB:
+    """
+    Minimal async client for the Appwrite TablesDB REST API.
+    Mirrors the SDK method signatures we use, but returns plain dicts and
+    reuses keep-alive connections from one pooled httpx client.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        project_id: str,
+        api_key: str,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        timeout: float = 10,
+        transport=None
+    ):
+        if not endpoint or not project_id or not api_key:
+            raise Exception("❌ Appwrite ENV variables missing")
+
+        self._client = httpx.AsyncClient(
+            base_url=endpoint.rstrip("/"),
+            headers={
+                "x-appwrite-project": project_id,
+                "x-appwrite-key": api_key,
+                "x-sdk-name": "Python",
+                "x-sdk-platform": "server",
+                "X-Appwrite-Response-Format": "1.8.0",
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+            ),
+            timeout=timeout,
+            transport=transport,
+        )
+
+    @staticmethod
+    def _rows_path(database_id: str, table_id: str, row_id: str | None = None) -> str:
+        path = f"/tablesdb/{database_id}/tables/{table_id}/rows"
+        return f"{path}/{row_id}" if row_id else path
+
+    async def _call(self, method: str, path: str, params=None, json=None):
+        try:
+            response = await self._client.request(method, path, params=params, json=json)
+        except httpx.HTTPError as e:
+            raise AppwriteException(str(e))
+
+        if response.is_error:
+            body = {}
+            if response.headers.get("content-type", "").startswith("application/json"):
+                body = response.json()
+            raise AppwriteException(
+                body.get("message", response.text),
+                response.status_code,
+                body.get("type"),
+                response.text,
+            )
+
+        # DELETE answers 204 with no body
+        if not response.content:
+            return {}
+        return response.json()
+
+    @timed_appwrite_call("list_rows")
+    async def list_rows(self, database_id: str, table_id: str, queries: list[str] | None = None) -> dict:
+        # Same flattening the SDK does: queries[0]=..., queries[1]=...
+        params = [(f"queries[{i}]", q) for i, q in enumerate(queries or [])]
+        return await self._call("GET", self._rows_path(database_id, table_id), params=params)
+
+    @timed_appwrite_call("get_row")
+    async def get_row(self, database_id: str, table_id: str, row_id: str) -> dict:
+        return await self._call("GET", self._rows_path(database_id, table_id, row_id))
+
+    @timed_appwrite_call("create_row")
+    async def create_row(self, database_id: str, table_id: str, row_id: str, data: dict, permissions: list[str] | None = None) -> dict:
+        return await self._call(
+            "POST",
+            self._rows_path(database_id, table_id),
+            json={"rowId": row_id, "data": data, "permissions": permissions},
+        )
+
+    @timed_appwrite_call("update_row")
+    async def update_row(self, database_id: str, table_id: str, row_id: str, data: dict) -> dict:
+        return await self._call(
+            "PATCH",
+            self._rows_path(database_id, table_id, row_id),
+            json={"data": data},
+        )
+
+    @timed_appwrite_call("delete_row")
+    async def delete_row(self, database_id: str, table_id: str, row_id: str):
+        try:
+            await self._call("DELETE", self._rows_path(database_id, table_id, row_id))
+        except AppwriteException as e:
+            # Already gone is fine
+            if e.code != 404:
+                raise
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+# ================= SHARED CLIENT =================
+
+_tables_db = None
+
+
+def get_tables_db() -> ResilientTablesDB:
+    """
+    The shared pooled client behind timeouts and per-table breakers, built
+    on first use. Also usable as a FastAPI dependency. Point
+    APPWRITE_ENDPOINT at a stub server for local testing.
+    """
+    global _tables_db
+    if _tables_db is None:
+        settings = get_settings()
+        _tables_db = ResilientTablesDB(AsyncTablesDB(
+            settings.appwrite_endpoint,
+            settings.appwrite_project_id,
+            settings.appwrite_api_key,
+            max_connections=settings.appwrite_max_connections,
+            max_keepalive=settings.appwrite_max_keepalive,
+            timeout=settings.appwrite_timeout,
+        ))
+    return _tables_db
+
+
+def set_tables_db(db):
+    """
+    Swap the shared client (e.g. for an in-memory fake). Repositories
+    without an explicit client pick it up on their next call.
+    """
+    global _tables_db
+    _tables_db = db
+
+
+async def close_tables_db():
+    global _tables_db
+    if _tables_db is not None:
+        await _tables_db.aclose()
+        _tables_db = None
+
+
+class TableRepository:
+    """
+    Base for repositories over one table. Client and ids are resolved on
+    each use from the shared client and settings unless given explicitly,
+    so constructing a repository at import time needs no credentials.
+    Subclasses implement query(*queries) -> list of records.
+    """
+    table_setting = ""
+
+    def __init__(self, db=None, database_id: str | None = None, table_id: str | None = None):
+        self._db = db
+        self._database_id = database_id
+        self._table_id = table_id
+
+    @property
+    def db(self):
+        return self._db or get_tables_db()
+
+    @db.setter
+    def db(self, value):
+        self._db = value
+
+    @property
+    def database_id(self) -> str:
+        return self._database_id or get_settings().database_id
+
+    @property
+    def table_id(self) -> str:
+        return self._table_id or getattr(get_settings(), self.table_setting)
+
+    async def iter_pages(self, *queries: str, page_size: int = 100):
+        """
+        Yield every matching record one page at a time, following the cursor,
+        so callers never hold more than `page_size` rows.
+        """
+        cursor = None
+        while True:
+            page_queries = [*queries, Query.limit(page_size)]
+            if cursor:
+                page_queries.append(Query.cursor_after(cursor))
+
+            page = await self.query(*page_queries)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            cursor = page[-1].id
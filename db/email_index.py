@@ -0,0 +1,164 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from appwrite.exception import AppwriteException
+from db.client import TableRepository
+from db.users import users as users_repo
+from utils.cache import TTLCache
+
+# Fall back to list_rows on users for accounts created before the index existed
+EMAIL_INDEX_LEGACY_FALLBACK = os.getenv("EMAIL_INDEX_LEGACY_FALLBACK", "true").lower() == "true"
+EMAIL_CACHE_SIZE = int(os.getenv("EMAIL_CACHE_SIZE", "10000"))
+EMAIL_CACHE_TTL = float(os.getenv("EMAIL_CACHE_TTL", "600"))
+# Kept short: another worker may register the email in the meantime
+EMAIL_NEGATIVE_CACHE_TTL = float(os.getenv("EMAIL_NEGATIVE_CACHE_TTL", "5"))
+# An index row this old without its user row is left over from a failed
+# registration; younger ones may belong to a registration still in progress
+EMAIL_RESERVATION_GRACE = float(os.getenv("EMAIL_RESERVATION_GRACE", "60"))
+
+
+class DuplicateEmail(Exception):
+    pass
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+def email_row_id(email: str) -> str:
+    """
+    Deterministic index row id for a normalized email (36 hex chars, a valid Appwrite id).
+    """
+    return hashlib.sha256(normalize_email(email).encode()).hexdigest()[:36]
+
+
+class EmailIndex(TableRepository):
+    """
+    Unique normalized-email -> user id index stored as one row per email.
+
+    The row id is derived from the email, so lookups are single get_row
+    point reads and creating the row doubles as an atomic uniqueness check.
+    A row whose user was never created (registration died between reserve
+    and create) is removed on lookup once it is past the reservation grace.
+    """
+
+    table_setting = "email_index_table_id"
+
+    def __init__(self, users, legacy_fallback: bool, **table):
+        super().__init__(**table)
+        self.users = users
+        self.legacy_fallback = legacy_fallback
+        self.positive = TTLCache(maxsize=EMAIL_CACHE_SIZE, ttl=EMAIL_CACHE_TTL)
+        self.negative = TTLCache(maxsize=EMAIL_CACHE_SIZE, ttl=EMAIL_NEGATIVE_CACHE_TTL)
+
+    async def lookup(self, email: str) -> str | None:
+        """
+        User id registered for `email`, or None.
+        """
+        key = normalize_email(email)
+        user_id = self.positive.get(key)
+        if user_id is not None:
+            return user_id
+        if self.negative.get(key):
+            return None
+
+        try:
+            row = await self.db.get_row(
+                database_id=self.database_id,
+                table_id=self.table_id,
+                row_id=email_row_id(key)
+            )
+            user_id = row.get("userId")
+            if not user_id or not await self.users.get(user_id):
+                user_id = await self._repair(email, row)
+        except AppwriteException as e:
+            if e.code != 404:
+                raise
+            user_id = await self._legacy_lookup(email)
+
+        if user_id:
+            self.positive.set(key, user_id)
+        else:
+            self.negative.set(key, True)
+        return user_id
+
+    async def _repair(self, email: str, row: dict) -> str | None:
+        """
+        Index row without a user row: still reserved while young, else
+        dropped and the email looked up again from the users table.
+        """
+        created_at = row.get("$createdAt")
+        if created_at:
+            age = datetime.now(timezone.utc) - datetime.fromisoformat(created_at)
+            if age.total_seconds() < EMAIL_RESERVATION_GRACE:
+                return row.get("userId")
+
+        print("EMAIL INDEX: dropping dangling row for", normalize_email(email))
+        await self.release(email, row.get("userId"))
+        return await self._legacy_lookup(email)
+
+    async def _legacy_lookup(self, email: str) -> str | None:
+        if not self.legacy_fallback:
+            return None
+
+        user = await self.users.find_by_email(email)
+        if not user:
+            return None
+
+        # Backfill so the next lookup is a point read
+        try:
+            await self.reserve(email, user.id)
+        except DuplicateEmail:
+            pass
+        return user.id
+
+    async def reserve(self, email: str, user_id: str):
+        """
+        Claim `email` for `user_id`. Raises DuplicateEmail if it is already taken.
+        """
+        key = normalize_email(email)
+        try:
+            await self.db.create_row(
+                database_id=self.database_id,
+                table_id=self.table_id,
+                row_id=email_row_id(key),
+                data={"email": key, "userId": user_id}
+            )
+        except AppwriteException as e:
+            if e.code == 409:
+                raise DuplicateEmail(key)
+            raise
+
+        self.negative.invalidate(key)
+        self.positive.set(key, user_id)
+
+    async def release(self, email: str, user_id: str | None = None):
+        """
+        Undo a reservation whose user row could not be created. With
+        `user_id`, only a row still pointing at that user is removed, so a
+        failed attempt never deletes another registration's reservation.
+        """
+        key = normalize_email(email)
+        self.positive.invalidate(key)
+        if user_id is not None:
+            try:
+                row = await self.db.get_row(
+                    database_id=self.database_id,
+                    table_id=self.table_id,
+                    row_id=email_row_id(key)
+                )
+            except AppwriteException as e:
+                if e.code == 404:
+                    return
+                raise
+            if row.get("userId") != user_id:
+                return
+
+        await self.db.delete_row(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            row_id=email_row_id(key)
+        )
+
+
+email_index = EmailIndex(users_repo, EMAIL_INDEX_LEGACY_FALLBACK)
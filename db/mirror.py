@@ -0,0 +1,289 @@
+import asyncio
+import os
+import sqlite3
+import time
+import orjson
+from appwrite.query import Query
+from db.client import get_tables_db
+from db.records import Order, User
+from settings import get_settings
+
+READ_MIRROR = os.getenv("READ_MIRROR", "false").lower() == "true"
+READ_MIRROR_PATH = os.getenv("READ_MIRROR_PATH", "read_mirror.sqlite3")
+READ_MIRROR_INTERVAL = float(os.getenv("READ_MIRROR_INTERVAL", "5"))
+# Reads fall back to Appwrite once the last completed sync is older than this
+READ_MIRROR_MAX_STALENESS = float(os.getenv("READ_MIRROR_MAX_STALENESS", "30"))
+READ_MIRROR_PAGE_SIZE = int(os.getenv("READ_MIRROR_PAGE_SIZE", "500"))
+
+# Mirrored table -> settings attribute holding its Appwrite table id
+TABLES = {"users": "users_table_id", "orders": "orders_table_id"}
+
+
+def _user_values(row: dict) -> tuple:
+    # Password hashes are never copied to local disk; login keeps reading Appwrite
+    data = {k: v for k, v in row.items() if k != "passwordHash"}
+    return row["$id"], row.get("email"), row.get("mobile"), row.get("$updatedAt"), orjson.dumps(data)
+
+
+def _order_values(row: dict) -> tuple:
+    return (
+        row["$id"], row.get("userId"), row.get("email"), row.get("$createdAt"),
+        row.get("$updatedAt"), orjson.dumps(row),
+    )
+
+
+UPSERTS = {
+    "users": (
+        "INSERT OR REPLACE INTO users (id, email, mobile, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+        _user_values,
+    ),
+    "orders": (
+        "INSERT OR REPLACE INTO orders (id, user_id, email, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+        _order_values,
+    ),
+}
+
+
+class ReadMirror:
+    """
+    Optional local SQLite copy of the users and orders tables for the
+    profile / current-user / my-orders reads.
+
+    A background task pulls rows changed since the last pass (ordered by
+    $updatedAt, resuming from a stored cursor) and upserts them. Workers on
+    a host share the file; a pass is skipped when another worker finished
+    one less than an interval ago. Reads only use the mirror while the last
+    completed pass is younger than READ_MIRROR_MAX_STALENESS, and not for a
+    user any worker wrote to since that pass started (recorded in the shared
+    `written` table), so people see their own changes whichever worker
+    serves the read. Writes always go to Appwrite.
+
+    Rows deleted in Appwrite stay in the mirror; the app never deletes users
+    or orders, and removing the file forces a full resync.
+    """
+
+    def __init__(self, enabled: bool, path: str, interval: float, max_staleness: float, page_size: int):
+        self.enabled = enabled
+        self.path = path
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self.page_size = page_size
+        self._db: sqlite3.Connection | None = None
+        self._task: asyncio.Task | None = None
+
+    # ================= LIFECYCLE =================
+
+    async def start(self):
+        if not self.enabled:
+            return
+
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id TEXT PRIMARY KEY,
+                email TEXT,
+                mobile TEXT,
+                updated_at TEXT,
+                data BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS users_email ON users (email);
+            CREATE TABLE IF NOT EXISTS orders (
+                id TEXT PRIMARY KEY,
+                user_id TEXT,
+                email TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                data BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS orders_user ON orders (user_id, created_at DESC, id DESC);
+            CREATE TABLE IF NOT EXISTS sync_cursor (
+                name TEXT PRIMARY KEY,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                started_at REAL NOT NULL,
+                finished_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS written (
+                user_id TEXT PRIMARY KEY,
+                at REAL NOT NULL
+            );
+            """
+        )
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                print("READ MIRROR SYNC ERROR:", e)
+            await asyncio.sleep(self.interval)
+
+    # ================= SYNC =================
+
+    def _state(self) -> tuple[float, float]:
+        row = self._db.execute("SELECT started_at, finished_at FROM sync_state WHERE id = 1").fetchone()
+        return row or (0.0, 0.0)
+
+    def _cursor(self, name: str) -> str | None:
+        row = self._db.execute("SELECT updated_at FROM sync_cursor WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _commit_page(self, name: str, rows: list[dict]):
+        sql, values = UPSERTS[name]
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany(sql, [values(row) for row in rows])
+            # Never move the cursor backwards if another worker got further
+            self._db.execute(
+                """
+                INSERT INTO sync_cursor (name, updated_at) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET updated_at = MAX(updated_at, excluded.updated_at)
+                """,
+                (name, rows[-1]["$updatedAt"])
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    async def _sync_table(self, name: str) -> int:
+        settings = get_settings()
+        table_id = getattr(settings, TABLES[name])
+        queries = [Query.order_asc("$updatedAt")]
+        since = self._cursor(name)
+        if since:
+            # >=: rows sharing the cursor's timestamp are upserted again, harmlessly
+            queries.insert(0, Query.greater_than_equal("$updatedAt", since))
+
+        synced, after = 0, None
+        while True:
+            page_queries = [*queries, Query.limit(self.page_size)]
+            if after:
+                page_queries.append(Query.cursor_after(after))
+
+            result = await get_tables_db().list_rows(
+                database_id=settings.database_id,
+                table_id=table_id,
+                queries=page_queries
+            )
+            rows = result.get("rows") or []
+            if rows:
+                self._commit_page(name, rows)
+                synced += len(rows)
+            if len(rows) < self.page_size:
+                return synced
+            after = rows[-1]["$id"]
+
+    async def sync(self) -> int:
+        """
+        Pull rows changed since the stored cursors. Returns how many were upserted.
+        """
+        started_at = time.time()
+        if started_at - self._state()[1] < self.interval / 2:
+            return 0
+
+        synced = 0
+        for name in TABLES:
+            synced += await self._sync_table(name)
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO sync_state (id, started_at, finished_at) VALUES (1, ?, ?)",
+            (started_at, time.time())
+        )
+        # Writes before this pass started are in the mirror now
+        self._db.execute("DELETE FROM written WHERE at < ?", (started_at,))
+        return synced
+
+    # ================= READS =================
+
+    def note_write(self, user_id: str | None):
+        """
+        Called on every write affecting `user_id`, so their reads go to
+        Appwrite (in every worker) until a sync that started after the
+        write has finished.
+        """
+        if self._db is not None and user_id:
+            self._db.execute(
+                "INSERT INTO written (user_id, at) VALUES (?, ?)"
+                " ON CONFLICT (user_id) DO UPDATE SET at = MAX(at, excluded.at)",
+                (user_id, time.time())
+            )
+
+    def serves(self, user_id: str | None = None) -> bool:
+        if self._db is None:
+            return False
+        started_at, finished_at = self._state()
+        if time.time() - finished_at > self.max_staleness:
+            return False
+        if user_id is None:
+            return True
+        row = self._db.execute("SELECT at FROM written WHERE user_id = ?", (user_id,)).fetchone()
+        return row is None or row[0] < started_at
+
+    def lag(self) -> float | None:
+        """
+        Seconds since the last completed sync, or None when the mirror is off.
+        """
+        if self._db is None:
+            return None
+        return time.time() - self._state()[1]
+
+    def user(self, user_id: str) -> User | None:
+        row = self._db.execute("SELECT data FROM users WHERE id = ?", (user_id,)).fetchone()
+        return User.from_row(orjson.loads(row[0])) if row else None
+
+    def find_user(self, email: str | None = None, mobile: str | None = None) -> User | None:
+        clauses, params = [], []
+        if email:
+            clauses.append("email = ?")
+            params.append(email)
+        if mobile:
+            clauses.append("mobile = ?")
+            params.append(mobile)
+        if not clauses:
+            return None
+
+        row = self._db.execute(f"SELECT data FROM users WHERE {' AND '.join(clauses)} LIMIT 1", params).fetchone()
+        return User.from_row(orjson.loads(row[0])) if row else None
+
+    def orders_for(self, user_id: str, cursor: str | None, limit: int) -> list[Order] | None:
+        """
+        Up to `limit` of the user's orders, newest first, after order `cursor`.
+        None if the cursor order is not in the mirror yet.
+        """
+        where, params = "user_id = ?", [user_id]
+        if cursor:
+            anchor = self._db.execute(
+                "SELECT created_at FROM orders WHERE id = ? AND user_id = ?", (cursor, user_id)
+            ).fetchone()
+            if anchor is None:
+                return None
+            where += " AND (created_at, id) < (?, ?)"
+            params += [anchor[0], cursor]
+
+        rows = self._db.execute(
+            f"SELECT data FROM orders WHERE {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            [*params, limit]
+        )
+        return [Order.from_row(orjson.loads(data)) for (data,) in rows]
+
+
+read_mirror = ReadMirror(
+    READ_MIRROR, READ_MIRROR_PATH, READ_MIRROR_INTERVAL, READ_MIRROR_MAX_STALENESS, READ_MIRROR_PAGE_SIZE
+)
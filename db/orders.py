@@ -0,0 +1,65 @@
+from appwrite.query import Query
+from db.client import TableRepository
+from db.mirror import read_mirror
+from db.records import Order
+from utils.response_cache import response_cache
+
+
+class OrderRepository(TableRepository):
+    table_setting = "orders_table_id"
+
+    async def query(self, *queries: str) -> list[Order]:
+        orders = await self.db.list_rows(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            queries=list(queries)
+        )
+        return [Order.from_row(row) for row in orders.get("rows") or []]
+
+    async def list_guest_orders(self, email: str, limit: int = 25) -> list[Order]:
+        return await self.query(
+            Query.equal("email", email),
+            Query.equal("isGuest", True),
+            Query.select(["$id"]),
+            Query.limit(limit)
+        )
+
+    async def create(self, row_id: str, data: dict) -> Order:
+        row = await self.db.create_row(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            row_id=row_id,
+            data=data
+        )
+        response_cache.bump(data.get("userId"))
+        read_mirror.note_write(data.get("userId"))
+        return Order.from_row(row)
+
+    async def claim(self, order_id: str, user_id: str) -> Order:
+        row = await self.db.update_row(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            row_id=order_id,
+            data={
+                "isGuest": False,
+                "userId": user_id
+            }
+        )
+        response_cache.bump(user_id)
+        read_mirror.note_write(user_id)
+        return Order.from_row(row)
+
+    async def update_status(self, order_id: str, status: str) -> Order:
+        row = await self.db.update_row(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            row_id=order_id,
+            data={"status": status}
+        )
+        order = Order.from_row(row)
+        response_cache.bump(order.userId)
+        read_mirror.note_write(order.userId)
+        return order
+
+
+orders = OrderRepository()
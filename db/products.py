@@ -0,0 +1,17 @@
+from db.client import TableRepository
+from db.records import Product
+
+
+class ProductRepository(TableRepository):
+    table_setting = "products_table_id"
+
+    async def query(self, *queries: str) -> list[Product]:
+        products = await self.db.list_rows(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            queries=list(queries)
+        )
+        return [Product.from_row(row) for row in products.get("rows") or []]
+
+
+products = ProductRepository()
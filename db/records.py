@@ -0,0 +1,112 @@
+class User:
+    """
+    Compact user record built once from an Appwrite row.
+    """
+    __slots__ = ("id", "name", "email", "mobile", "role", "password_hash")
+
+    def __init__(self, id, name=None, email=None, mobile=None, role=None, password_hash=None):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.mobile = mobile
+        self.role = role
+        self.password_hash = password_hash
+
+    @classmethod
+    def from_row(cls, row: dict) -> "User":
+        get = row.get
+        return cls(
+            row["$id"],
+            get("name"),
+            get("email"),
+            get("mobile"),
+            get("role"),
+            get("passwordHash"),
+        )
+
+
+class Order:
+    """
+    Compact order record. Attribute names are the public field names used
+    by the order-history `?fields=` contract.
+    """
+    __slots__ = (
+        "id", "createdAt", "updatedAt", "email", "isGuest", "userId", "name",
+        "country", "state", "city", "street", "pincode", "phone",
+        "paymentMethod", "items", "total", "status",
+    )
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Order":
+        get = row.get
+        order = cls.__new__(cls)
+        order.id = row["$id"]
+        order.createdAt = get("$createdAt")
+        order.updatedAt = get("$updatedAt")
+        order.email = get("email")
+        order.isGuest = get("isGuest")
+        order.userId = get("userId")
+        order.name = get("name")
+        order.country = get("country")
+        order.state = get("state")
+        order.city = get("city")
+        order.street = get("street")
+        order.pincode = get("pincode")
+        order.phone = get("phone")
+        order.paymentMethod = get("paymentMethod")
+        order.items = get("items") or []
+        order.total = get("total") or 0
+        order.status = get("status") or "Pending"
+        return order
+
+
+class Product:
+    """
+    Catalog entry used to price orders server-side.
+    """
+    __slots__ = ("id", "name", "price", "active")
+
+    def __init__(self, id, name=None, price=0.0, active=True):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.active = active
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Product":
+        get = row.get
+        return cls(
+            row["$id"],
+            get("name"),
+            float(get("price") or 0),
+            get("isActive", True) is not False,
+        )
+
+
+class Session:
+    """
+    Refresh-token session: one per login, rotated on every refresh.
+    """
+    __slots__ = ("id", "user_id", "token_hash", "previous_hash", "rotated_at", "expires_at", "revoked_at")
+
+    def __init__(self, id, user_id=None, token_hash=None, previous_hash=None, rotated_at=None, expires_at=None, revoked_at=None):
+        self.id = id
+        self.user_id = user_id
+        self.token_hash = token_hash
+        self.previous_hash = previous_hash
+        self.rotated_at = rotated_at
+        self.expires_at = expires_at
+        self.revoked_at = revoked_at
+
+    @classmethod
+    def from_row(cls, row: dict) -> "Session":
+        get = row.get
+        return cls(
+            row["$id"],
+            get("userId"),
+            get("tokenHash"),
+            get("previousHash"),
+            get("rotatedAt"),
+            get("expiresAt"),
+            get("revokedAt"),
+        )
@@ -0,0 +1,289 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from appwrite.exception import AppwriteException
+from utils.cache import TTLCache
+from utils.metrics import APPWRITE_RETRIES_TOTAL, APPWRITE_SHORT_CIRCUITED_TOTAL, APPWRITE_STALE_READS_TOTAL
+
+# Per-call deadlines; shorter than the snapshot timeouts so a slow read
+# still leaves time to fall back to a stale copy
+APPWRITE_READ_TIMEOUT = float(os.getenv("APPWRITE_READ_TIMEOUT", "2"))
+APPWRITE_WRITE_TIMEOUT = float(os.getenv("APPWRITE_WRITE_TIMEOUT", "5"))
+
+# Consecutive transient failures that open a table's breaker, and how long it stays open
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "15"))
+
+# Retries may add at most this fraction of extra read calls (plus a small per-second floor)
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", "0.1"))
+RETRY_BUDGET_MIN_PER_SEC = float(os.getenv("RETRY_BUDGET_MIN_PER_SEC", "1"))
+
+# Last good results of reads made under allow_stale()
+STALE_CACHE_SIZE = int(os.getenv("STALE_CACHE_SIZE", "5000"))
+STALE_TTL = float(os.getenv("STALE_TTL", "600"))
+
+
+class UpstreamUnavailable(AppwriteException):
+    """
+    Raised instead of calling Appwrite while a table's breaker is open, and
+    in place of a transient failure (timeout, 5xx) no stale copy could cover.
+    """
+
+    def __init__(self, table_id: str, retry_after: float):
+        super().__init__(f"Appwrite table {table_id} unavailable", 503, "circuit_open")
+        self.table_id = table_id
+        self.retry_after = retry_after
+
+
+def is_transient(e: Exception) -> bool:
+    """
+    Timeouts, connection errors, throttling and 5xx: Appwrite is struggling.
+    Other 4xx answers (404, 409, ...) mean it is up and answering.
+    """
+    if isinstance(e, (asyncio.TimeoutError, UpstreamUnavailable)):
+        return True
+    if isinstance(e, AppwriteException):
+        code = e.code or 0
+        return code == 0 or code >= 500 or code in (408, 429)
+    return False
+
+
+def _retryable(e: Exception) -> bool:
+    # A timed-out or throttled call would only add load if repeated
+    if isinstance(e, AppwriteException) and not isinstance(e, UpstreamUnavailable):
+        code = e.code or 0
+        return code == 0 or code in (500, 502, 503, 504)
+    return False
+
+
+# ================= STALE READS =================
+
+class StaleReads:
+    """
+    Set on the current request by allow_stale(); `served` turns True once
+    any read fell back to a stale copy.
+    """
+    __slots__ = ("served",)
+
+    def __init__(self):
+        self.served = False
+
+
+_stale_reads: ContextVar[StaleReads | None] = ContextVar("stale_reads", default=None)
+
+
+@contextmanager
+def allow_stale():
+    """
+    Let reads inside the block be answered from their last good result while
+    Appwrite is failing. Tasks started inside (asyncio.gather) share it.
+    """
+    reads = StaleReads()
+    token = _stale_reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _stale_reads.reset(token)
+
+
+# ================= BREAKER / BUDGET =================
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive transient errors; after
+    `reset_timeout` seconds one probe call is let through (half-open), and
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failures: int, reset_timeout: float):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failed = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open":
+            if self._probing:
+                return False
+            self._probing = True
+        return self.state != "open"
+
+    def retry_after(self) -> float:
+        return max(1.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def success(self):
+        self.state = "closed"
+        self._failed = 0
+        self._probing = False
+
+    def failure(self):
+        self._failed += 1
+        if self.state == "half_open" or self._failed >= self.failures:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    def abandon(self):
+        # A cancelled probe decided nothing; let the next call probe
+        self._probing = False
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to `ratio` of calls, so retries cannot
+    multiply load on an already failing backend.
+    """
+
+    def __init__(self, ratio: float, min_per_sec: float, capacity: float = 10):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def deposit(self):
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.min_per_sec)
+        self._updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+# ================= CLIENT =================
+
+class ResilientTablesDB:
+    """
+    Wraps a TablesDB client (AsyncTablesDB or a fake) with per-operation
+    timeouts, a circuit breaker per table and a shared retry budget.
+
+    Reads failing with a connection error or 5xx are retried once if the
+    budget allows. Writes are never retried here (the order queue does
+    that with backoff). Inside allow_stale(), successful reads are kept and
+    served again when the breaker is open or the call fails.
+    """
+
+    def __init__(
+        self,
+        db,
+        read_timeout: float = APPWRITE_READ_TIMEOUT,
+        write_timeout: float = APPWRITE_WRITE_TIMEOUT,
+        failures: int = BREAKER_FAILURES,
+        reset_timeout: float = BREAKER_RESET
+    ):
+        self.inner = db
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.budget = RetryBudget(RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN_PER_SEC)
+        self.last_good = TTLCache(maxsize=STALE_CACHE_SIZE, ttl=STALE_TTL)
+
+    def breaker(self, table_id: str) -> CircuitBreaker:
+        breaker = self.breakers.get(table_id)
+        if breaker is None:
+            breaker = self.breakers[table_id] = CircuitBreaker(self.failures, self.reset_timeout)
+        return breaker
+
+    def stats(self) -> dict:
+        return {table: breaker.state for table, breaker in self.breakers.items()}
+
+    def _fallback(self, table_id: str, key, error: Exception):
+        reads = _stale_reads.get() if key is not None else None
+        if reads is not None:
+            stale = self.last_good.get((table_id, key))
+            if stale is not None:
+                APPWRITE_STALE_READS_TOTAL.inc(table_id)
+                reads.served = True
+                return stale
+        if isinstance(error, UpstreamUnavailable):
+            raise error
+        breaker = self.breaker(table_id)
+        raise UpstreamUnavailable(table_id, breaker.retry_after() if breaker.state == "open" else 1) from error
+
+    async def _call(self, operation: str, table_id: str, call, key=None):
+        """
+        Run `call()` under the table's breaker. `key` identifies a read for
+        retries and stale fallback; writes pass None.
+        """
+        breaker = self.breaker(table_id)
+        timeout = self.read_timeout if key is not None else self.write_timeout
+        self.budget.deposit()
+        retried = False
+
+        while True:
+            if not breaker.allow():
+                APPWRITE_SHORT_CIRCUITED_TOTAL.inc(table_id, operation)
+                return self._fallback(table_id, key, UpstreamUnavailable(table_id, breaker.retry_after()))
+
+            try:
+                result = await asyncio.wait_for(call(), timeout=timeout)
+            except asyncio.CancelledError:
+                breaker.abandon()
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    breaker.success()
+                    raise
+                breaker.failure()
+                if key is not None and not retried and _retryable(e) and self.budget.withdraw():
+                    APPWRITE_RETRIES_TOTAL.inc(table_id, operation)
+                    retried = True
+                    continue
+                return self._fallback(table_id, key, e)
+
+            breaker.success()
+            if key is not None and _stale_reads.get() is not None:
+                self.last_good.set((table_id, key), result)
+            return result
+
+    # ================= TablesDB API =================
+
+    async def list_rows(self, database_id: str, table_id: str, queries: list[str] | None = None) -> dict:
+        return await self._call(
+            "list_rows", table_id,
+            lambda: self.inner.list_rows(database_id=database_id, table_id=table_id, queries=queries),
+            key=("list", *(queries or ()))
+        )
+
+    async def get_row(self, database_id: str, table_id: str, row_id: str) -> dict:
+        return await self._call(
+            "get_row", table_id,
+            lambda: self.inner.get_row(database_id=database_id, table_id=table_id, row_id=row_id),
+            key=("get", row_id)
+        )
+
+    async def create_row(self, database_id: str, table_id: str, row_id: str, data: dict, permissions: list[str] | None = None) -> dict:
+        return await self._call(
+            "create_row", table_id,
+            lambda: self.inner.create_row(
+                database_id=database_id, table_id=table_id, row_id=row_id, data=data, permissions=permissions
+            )
+        )
+
+    async def update_row(self, database_id: str, table_id: str, row_id: str, data: dict) -> dict:
+        return await self._call(
+            "update_row", table_id,
+            lambda: self.inner.update_row(database_id=database_id, table_id=table_id, row_id=row_id, data=data)
+        )
+
+    async def delete_row(self, database_id: str, table_id: str, row_id: str):
+        return await self._call(
+            "delete_row", table_id,
+            lambda: self.inner.delete_row(database_id=database_id, table_id=table_id, row_id=row_id)
+        )
+
+    async def aclose(self):
+        await self.inner.aclose()
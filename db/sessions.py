@@ -0,0 +1,49 @@
+from appwrite.exception import AppwriteException
+from db.client import TableRepository
+from db.records import Session
+
+
+class SessionRepository(TableRepository):
+    table_setting = "sessions_table_id"
+
+    async def query(self, *queries: str) -> list[Session]:
+        sessions = await self.db.list_rows(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            queries=list(queries)
+        )
+        return [Session.from_row(row) for row in sessions.get("rows") or []]
+
+    async def get(self, session_id: str) -> Session | None:
+        try:
+            row = await self.db.get_row(
+                database_id=self.database_id,
+                table_id=self.table_id,
+                row_id=session_id
+            )
+        except AppwriteException as e:
+            if e.code == 404:
+                return None
+            raise
+        return Session.from_row(row)
+
+    async def create(self, session_id: str, data: dict) -> Session:
+        row = await self.db.create_row(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            row_id=session_id,
+            data=data
+        )
+        return Session.from_row(row)
+
+    async def update(self, session_id: str, data: dict) -> Session:
+        row = await self.db.update_row(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            row_id=session_id,
+            data=data
+        )
+        return Session.from_row(row)
+
+
+sessions = SessionRepository()
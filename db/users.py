@@ -0,0 +1,85 @@
+import os
+from appwrite.query import Query
+from appwrite.exception import AppwriteException
+from db.client import TableRepository
+from db.mirror import read_mirror
+from db.records import User
+from utils.cache import TTLCache
+from utils.response_cache import response_cache
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+
+
+class UserRepository(TableRepository):
+    table_setting = "users_table_id"
+
+    def __init__(self, cache: TTLCache, **table):
+        super().__init__(**table)
+        self.cache = cache
+
+    async def get(self, user_id: str) -> User | None:
+        user = self.cache.get(user_id)
+        if user is not None:
+            return user
+
+        try:
+            row = await self.db.get_row(
+                database_id=self.database_id,
+                table_id=self.table_id,
+                row_id=user_id
+            )
+        except AppwriteException as e:
+            if e.code == 404:
+                return None
+            raise
+
+        user = User.from_row(row)
+        self.cache.set(user_id, user)
+        return user
+
+    async def find_one(self, *queries: str) -> User | None:
+        users = await self.db.list_rows(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            queries=[*queries, Query.limit(1)]
+        )
+        rows = users.get("rows") or []
+        if not rows:
+            return None
+
+        user = User.from_row(rows[0])
+        self.cache.set(user.id, user)
+        return user
+
+    async def find_by_email(self, email: str) -> User | None:
+        return await self.find_one(Query.equal("email", email))
+
+    async def create(self, row_id: str, data: dict) -> User:
+        self.cache.invalidate(row_id)
+        row = await self.db.create_row(
+            database_id=self.database_id,
+            table_id=self.table_id,
+            row_id=row_id,
+            data=data
+        )
+        return User.from_row(row)
+
+    async def update(self, user_id: str, data: dict) -> User:
+        # Invalidate on every write (profile edits, role changes, rehash)
+        self.cache.invalidate(user_id)
+        try:
+            row = await self.db.update_row(
+                database_id=self.database_id,
+                table_id=self.table_id,
+                row_id=user_id,
+                data=data
+            )
+            return User.from_row(row)
+        finally:
+            self.cache.invalidate(user_id)
+            response_cache.bump(user_id)
+            read_mirror.note_write(user_id)
+
+
+users = UserRepository(TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL))
@@ -0,0 +1,65 @@
+"""
+Production server profile:
+
+    gunicorn main:app -c gunicorn.conf.py
+
+Uvicorn workers under gunicorn, one per core by default (WEB_CONCURRENCY
+overrides). The app is imported once in the master and forked, so workers
+start without re-importing.
+
+On SIGTERM each worker immediately fails /ready and ends open order event
+streams, keeps serving for SHUTDOWN_DRAIN_DELAY so the load balancer can
+stop routing to it, then stops accepting. In-flight requests get up to
+GRACEFUL_SHUTDOWN_TIMEOUT, and spooled order writes ORDER_DRAIN_TIMEOUT,
+before it exits; graceful_timeout covers all three.
+
+Every worker is its own process: in-memory caches, rate limits, order
+event subscribers and /metrics counters are per worker. A /metrics scrape
+reaches one worker, so sum counters across workers (or run one worker per
+container) and expect resets when a worker restarts.
+"""
+import multiprocessing
+import os
+import time
+from uvicorn_worker import UvicornWorker
+
+bind = f"0.0.0.0:{os.getenv('PORT', '7860')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+
+# Read by the app (preloaded after this file): bcrypt pool sized per worker,
+# and the LB drain window before listeners close
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+os.environ.setdefault("SHUTDOWN_DRAIN_DELAY", "5")
+
+SHUTDOWN_DRAIN_DELAY = float(os.environ["SHUTDOWN_DRAIN_DELAY"])
+GRACEFUL_SHUTDOWN_TIMEOUT = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "10"))
+ORDER_DRAIN_TIMEOUT = float(os.getenv("ORDER_DRAIN_TIMEOUT", "10"))
+
+
+class Worker(UvicornWorker):
+    # Bound the wait for open connections so the spool drain still runs before SIGKILL
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "timeout_graceful_shutdown": GRACEFUL_SHUTDOWN_TIMEOUT}
+
+
+worker_class = Worker
+
+# Import main.py once in the master; workers share the loaded modules
+preload_app = True
+
+# Drain window: LB delay, in-flight requests, then the order spool flush
+graceful_timeout = int(SHUTDOWN_DRAIN_DELAY + GRACEFUL_SHUTDOWN_TIMEOUT + ORDER_DRAIN_TIMEOUT) + 10
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+_started = time.perf_counter()
+
+
+def when_ready(server):
+    server.log.info(
+        "STARTUP [master]: app preloaded, %d workers, ready after %.0fms",
+        workers, (time.perf_counter() - _started) * 1000
+    )
@@ -1,15 +1,86 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
+from utils.startup import startup_timer
 
-load_dotenv()
+with startup_timer.phase("import.framework"):
+    from contextlib import asynccontextmanager
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse, PlainTextResponse
+    from fastapi.middleware.cors import CORSMiddleware
+    from dotenv import load_dotenv
 
-from routes.auth import router as auth_router
-from routes.current_user import router as current_user_router
-from routes.profile import router as profile_router
-from routes.orders import router as orders_router
+with startup_timer.phase("dotenv"):
+    load_dotenv()
 
-app = FastAPI(title="Segmento Backend")
+with startup_timer.phase("import.app"):
+    from routes.auth import router as auth_router
+    from routes.current_user import router as current_user_router
+    from routes.profile import router as profile_router
+    from routes.orders import router as orders_router
+    from routes.analytics import router as analytics_router
+    from auth.jwt import get_jwt_settings, token_cache_stats
+    from auth.revocation import revoked_sessions
+    from auth.sessions import session_manager
+    from db.client import close_tables_db, get_tables_db
+    from db.resilience import UpstreamUnavailable
+    from db.mirror import read_mirror
+    from db.users import users as users_repo
+    from services.order_queue import order_queue, ORDER_DRAIN_TIMEOUT
+    from services.order_analytics import order_analytics
+    from services.catalog import catalog
+    from services.guest_orders import claim_state
+    from services.order_events import order_events
+    from services.order_import import order_importer
+    from services.readiness import readiness
+    from utils.pwd import shutdown_executor
+    from utils.response_cache import response_cache
+    from utils.rate_limit import RateLimitMiddleware
+    from utils.compression import CompressionMiddleware
+    from utils.metrics import MetricsMiddleware, CallbackGauge, render as render_metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with startup_timer.phase("lifespan.settings"):
+        get_jwt_settings()
+    with startup_timer.phase("lifespan.order_queue"):
+        await order_queue.start()
+        await claim_state.start()
+    with startup_timer.phase("lifespan.analytics"):
+        await order_analytics.start()
+    with startup_timer.phase("lifespan.catalog"):
+        await catalog.start()
+    with startup_timer.phase("lifespan.read_mirror"):
+        await read_mirror.start()
+    await response_cache.start()
+    await order_importer.start()
+    await order_events.start()
+    await session_manager.start()
+    startup_timer.log("worker")
+    # From here SIGTERM fails /ready and ends event streams right away
+    readiness.start()
+
+    yield
+
+    # Normally already drained at SIGTERM; then give spooled order
+    # writes a chance to reach Appwrite
+    readiness.stop()
+    await order_events.stop()
+    await session_manager.stop()
+    await read_mirror.stop()
+    await response_cache.stop()
+    await catalog.stop()
+    await order_analytics.stop()
+    await order_queue.stop(drain_timeout=ORDER_DRAIN_TIMEOUT)
+    await order_importer.stop()
+    await claim_state.stop()
+    # Release pooled Appwrite connections
+    await close_tables_db()
+    shutdown_executor()
+
+
+app = FastAPI(title="Segmento Backend", lifespan=lifespan)
+
+# Open SSE streams would otherwise hold the worker past its graceful timeout
+readiness.on_drain(order_events.close)
 
 # ✅ CORS CONFIG (FIXED)
 origins = [
@@ -20,6 +91,10 @@ origins = [
     "https://*.hf.space",  # Allow any Hugging Face Space subdomain
 ]
 
+# Throttle auth endpoints before any hashing or Appwrite work;
+# inside CORS so 429s still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -28,11 +103,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli/gzip for bodies over COMPRESS_MIN_SIZE; order lists shrink ~7x
+app.add_middleware(CompressionMiddleware)
+
+app.add_middleware(MetricsMiddleware)
+
+# ✅ APPWRITE BREAKER OPEN -> 503 (instead of a generic 500)
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable(request, exc: UpstreamUnavailable):
+    return JSONResponse(
+        {"detail": "Service temporarily unavailable, please retry"},
+        status_code=503,
+        headers={"Retry-After": str(int(exc.retry_after + 0.5))}
+    )
+
 # ✅ ROUTES (NO CHANGE)
 app.include_router(auth_router)
 app.include_router(current_user_router)
 app.include_router(profile_router)
 app.include_router(orders_router)
+app.include_router(analytics_router)
 
 # ✅ ROOT CHECK
 @app.get("/")
@@ -42,4 +132,44 @@ def root():
 # ✅ HEALTH CHECK (FOR DEBUGGING)
 @app.get("/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {
+        "status": "ok",
+        "userCache": users_repo.cache.stats(),
+        "tokenCache": token_cache_stats(),
+        "revokedSessions": len(revoked_sessions),
+        "responseCache": response_cache.entries.stats(),
+        "breakers": get_tables_db().stats(),
+        "readMirrorLag": read_mirror.lag(),
+        "orderEvents": order_events.stats(),
+        "startup": startup_timer.breakdown()
+    }
+
+# ✅ READINESS (FOR LOAD BALANCERS / ORCHESTRATORS)
+@app.get("/ready")
+async def ready():
+    ok, detail = await readiness.status()
+    return JSONResponse(detail, status_code=200 if ok else 503)
+
+# ✅ PROMETHEUS METRICS
+# Per process: under gunicorn each scrape reaches one worker, so counters
+# reset on worker restarts and must be summed across workers by the scraper
+CallbackGauge(
+    "user_cache_events", "User cache hits/misses since start", ("event",),
+    lambda: {("hit",): users_repo.cache.hits, ("miss",): users_repo.cache.misses}
+)
+CallbackGauge(
+    "order_spool_pending", "Orders spooled locally but not yet written to Appwrite", (),
+    lambda: {(): order_queue.pending_count()}
+)
+CallbackGauge(
+    "read_mirror_lag_seconds", "Seconds since the read mirror last finished a sync", (),
+    lambda: {} if read_mirror.lag() is None else {(): read_mirror.lag()}
+)
+CallbackGauge(
+    "order_event_subscribers", "Open order status event streams", (),
+    lambda: {(): order_events.stats()["subscribers"]}
+)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,17 +0,0 @@
-import os
-from fastapi import Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-
-def get_current_user(token: str = Depends(oauth2_scheme)):
-    try:
-        payload = jwt.decode(
-            token,
-            os.getenv("JWT_SECRET"),
-            algorithms=[os.getenv("JWT_ALGORITHM")]
-        )
-        return payload["sub"]
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
@@ -0,0 +1,83 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException
+from auth.deps import require_admin
+from services.order_analytics import order_analytics, DIMENSIONS, GROUPS
+
+router = APIRouter(prefix="/admin/analytics", tags=["Analytics"])
+
+
+def _as_of() -> str | None:
+    return order_analytics.checkpoint()[0]
+
+
+# ================= SUMMARY =================
+
+@router.get("/summary")
+def analytics_summary(
+    claims: dict = Depends(require_admin),
+    group: str = "day",                 # day | state | city | paymentMethod
+    since: date | None = None,          # Inclusive, UTC days
+    until: date | None = None
+):
+    if group not in GROUPS:
+        raise HTTPException(status_code=400, detail=f"group must be one of: {', '.join(GROUPS)}")
+
+    return {
+        "success": True,
+        "group": group,
+        "asOf": _as_of(),
+        "rows": order_analytics.summary(
+            group,
+            since.isoformat() if since else None,
+            until.isoformat() if until else None
+        )
+    }
+
+
+# ================= TOP ITEMS =================
+
+@router.get("/top-items")
+def analytics_top_items(
+    claims: dict = Depends(require_admin),
+    since: date | None = None,
+    until: date | None = None,
+    sort: str = "revenue",              # revenue | quantity
+    limit: int = 10,
+    dimension: str | None = None,       # state | city | paymentMethod, with value
+    value: str | None = None
+):
+    if sort not in ("revenue", "quantity"):
+        raise HTTPException(status_code=400, detail="sort must be revenue or quantity")
+    if dimension is not None and dimension not in DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of: {', '.join(DIMENSIONS)}")
+    if (dimension is None) != (value is None):
+        raise HTTPException(status_code=400, detail="dimension and value go together")
+
+    return {
+        "success": True,
+        "asOf": _as_of(),
+        "items": order_analytics.top_items(
+            since.isoformat() if since else None,
+            until.isoformat() if until else None,
+            max(1, min(limit, 100)),
+            sort,
+            dimension,
+            value
+        )
+    }
+
+
+# ================= REFRESH =================
+
+@router.post("/refresh")
+async def analytics_refresh(
+    claims: dict = Depends(require_admin),
+    full: bool = False                  # Recompute everything instead of catching up
+):
+    try:
+        added = await (order_analytics.rebuild() if full else order_analytics.refresh())
+        return {"success": True, "added": added, "asOf": _as_of()}
+
+    except Exception as e:
+        print("ANALYTICS REFRESH ERROR:", e)
+        raise HTTPException(status_code=502, detail="Analytics refresh failed")
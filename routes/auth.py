@@ -1,19 +1,20 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
 from pydantic import BaseModel, EmailStr
-from appwrite_client import tablesDB, _safe_get
-from appwrite.query import Query
-from utils.jwt import create_access_token, decode_access_token
-from utils.pwd import hash_password, verify_password
-import os, uuid, traceback
+from db.users import users as users_repo
+from db.email_index import email_index, DuplicateEmail
+from db.resilience import UpstreamUnavailable, allow_stale
+from services.guest_orders import claim_guest_orders, is_claimed
+from services.order_history import get_order_history, parse_fields, DEFAULT_PAGE_SIZE, FULL_FIELDS
+from auth.jwt import create_access_token
+from auth.deps import get_token_or_query_claims
+from auth.sessions import session_manager, InvalidRefreshToken
+from utils.pwd import hash_password_async, verify_and_update_async
+from utils.response_cache import response_cache
+from utils.responses import OrjsonResponse
+import uuid, traceback
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-# ================= ENV =================
-
-DATABASE_ID = os.getenv("DATABASE_ID")
-USERS_COLLECTION_ID = os.getenv("USERS_COLLECTION_ID")
-ORDERS_COLLECTION_ID = os.getenv("ORDERS_COLLECTION_ID")
-
 class RegisterRequest(BaseModel):
     name: str
     email: EmailStr
@@ -26,41 +27,88 @@ class LoginRequest(BaseModel):
     password: str
 
 
+class RefreshRequest(BaseModel):
+    refreshToken: str
+
+
+def _role(user) -> str:
+    role = user.role
+
+    if role:
+        role = role.strip().lower()
+
+    if role not in ["admin", "user"]:
+        role = "user"
+
+    return role
+
+
+async def _issue_tokens(user, role: str, session_id: str | None = None, refresh_token: str | None = None) -> dict:
+    """
+    Access token, plus a refresh token when sessions are configured.
+    A new session is started unless one is passed in (refresh).
+    """
+    claims = {"userId": user.id, "email": user.email, "role": role}
+    if not session_manager.enabled:
+        return {"token": create_access_token(claims)}
+
+    if session_id is None:
+        session_id, refresh_token = await session_manager.create(user.id)
+    token = create_access_token({**claims, "sid": session_id}, session_manager.access_ttl_minutes)
+    return {"token": token, "refreshToken": refresh_token, "expiresIn": session_manager.access_ttl}
+
+
 # ================= REGISTER =================
 
-@router.post("/register")
-def register_user(data: RegisterRequest):
+async def _release_reservation(email: str, user_id: str):
+    # Best effort: lookup() clears whatever is left once it is past the grace period
     try:
-        users = tablesDB.list_rows(
-            database_id=DATABASE_ID,
-            table_id=USERS_COLLECTION_ID,
-            queries=[Query.equal("email", data.email)]
-        )
+        await email_index.release(email, user_id)
+    except Exception as e:
+        print("EMAIL RELEASE ERROR:", e)
 
-        if _safe_get(users, "total", 0) > 0:
+
+@router.post("/register")
+async def register_user(data: RegisterRequest):
+    try:
+        if await email_index.lookup(data.email):
             raise HTTPException(status_code=400, detail="User already exists")
 
         if len(data.password) < 8:
             raise HTTPException(status_code=400, detail="Password must be at least 8 characters")
 
-        tablesDB.create_row(
-            database_id=DATABASE_ID,
-            table_id=USERS_COLLECTION_ID,
-            row_id=str(uuid.uuid4()),
-            data={
-                "name": data.name,
-                "email": data.email,
-                "mobile": data.mobile,
-                "passwordHash": hash_password(data.password),
-                "role": "user"
-            }
-        )
+        password_hash = await hash_password_async(data.password)
+        user_id = str(uuid.uuid4())
+
+        # The index row is the uniqueness check: two concurrent registrations
+        # for the same email cannot both create it
+        try:
+            await email_index.reserve(data.email, user_id)
+            await users_repo.create(
+                row_id=user_id,
+                data={
+                    "name": data.name,
+                    "email": data.email,
+                    "mobile": data.mobile,
+                    "passwordHash": password_hash,
+                    "role": "user"
+                }
+            )
+        except DuplicateEmail:
+            raise HTTPException(status_code=400, detail="User already exists")
+        except BaseException:
+            # Also covers a reserve that landed upstream before timing out
+            await _release_reservation(data.email, user_id)
+            raise
 
         return {
             "success": True,
             "message": "User registered successfully"
         }
 
+    except (HTTPException, UpstreamUnavailable):
+        raise
+
     except Exception as e:
         print("REGISTER ERROR:", e)
         traceback.print_exc()
@@ -74,73 +122,47 @@ def register_user(data: RegisterRequest):
 # ================= LOGIN =================
 
 @router.post("/login")
-def login_user(data: LoginRequest):
+async def login_user(data: LoginRequest, background_tasks: BackgroundTasks):
     try:
-        users = tablesDB.list_rows(
-            database_id=DATABASE_ID,
-            table_id=USERS_COLLECTION_ID,
-            queries=[Query.equal("email", data.email)]
-        )
-
-        if _safe_get(users, "total", 0) == 0:
-            raise HTTPException(status_code=404, detail="User not found")
+        user_id = await email_index.lookup(data.email)
+        user = await users_repo.get(user_id) if user_id else None
 
-        user_docs = _safe_get(users, "rows") or _safe_get(users, "documents") or []
-        user = user_docs[0] if user_docs else None
-        
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        stored_hash = _safe_get(user, "passwordHash")
-        if not verify_password(data.password, stored_hash):
+        stored_hash = user.password_hash
+        valid, new_hash = await verify_and_update_async(data.password, stored_hash)
+        if not valid:
             raise HTTPException(status_code=401, detail="Invalid password")
 
-        role = _safe_get(user, "role")
+        # Transparently upgrade outdated hashes (cost factor change / legacy plain text)
+        if new_hash:
+            try:
+                await users_repo.update(user.id, {"passwordHash": new_hash})
+            except Exception as e:
+                print("REHASH ERROR:", e)
 
-        if role:
-            role = role.strip().lower()
+        role = _role(user)
 
-        if role not in ["admin", "user"]:
-            role = "user"
-
-        guest_orders = tablesDB.list_rows(
-            database_id=DATABASE_ID,
-            table_id=ORDERS_COLLECTION_ID,
-            queries=[
-                Query.equal("email", data.email),
-                Query.equal("isGuest", True)
-            ]
-        )
-
-        for order in (_safe_get(guest_orders, "rows") or []):
-            tablesDB.update_row(
-                database_id=DATABASE_ID,
-                table_id=ORDERS_COLLECTION_ID,
-                row_id=_safe_get(order, "$id"),
-                data={
-                    "isGuest": False,
-                    "userId": _safe_get(user, "$id")
-                }
-            )
-
-        token = create_access_token({
-            "userId": _safe_get(user, "$id"),
-            "email": _safe_get(user, "email"),
-            "role": role
-        })
+        # Claim guest checkouts after the response is sent
+        if not is_claimed(data.email):
+            background_tasks.add_task(claim_guest_orders, data.email, user.id)
 
         return {
             "success": True,
-            "token": token,
+            **await _issue_tokens(user, role),
             "user": {
-                "id": _safe_get(user, "$id"),
-                "name": _safe_get(user, "name"),
-                "email": _safe_get(user, "email"),
-                "mobile": _safe_get(user, "mobile"),
+                "id": user.id,
+                "name": user.name,
+                "email": user.email,
+                "mobile": user.mobile,
                 "role": role
             }
         }
 
+    except (HTTPException, UpstreamUnavailable):
+        raise
+
     except Exception as e:
         print("LOGIN ERROR:", e)
         traceback.print_exc()
@@ -151,30 +173,92 @@ def login_user(data: LoginRequest):
         )
 
 
+# ================= REFRESH / LOGOUT =================
+
+@router.post("/refresh")
+async def refresh_tokens(data: RefreshRequest):
+    """
+    Rotate a refresh token: the old one stops working, a new pair is returned.
+    """
+    if not session_manager.enabled:
+        raise HTTPException(status_code=404, detail="Refresh tokens are not enabled")
+
+    try:
+        session_id, user_id, refresh_token = await session_manager.rotate(data.refreshToken)
+
+        # Re-read the user so role changes apply at the next refresh
+        user = await users_repo.get(user_id)
+        if not user:
+            await session_manager.revoke_session(session_id)
+            raise InvalidRefreshToken()
+
+        return {
+            "success": True,
+            **await _issue_tokens(user, _role(user), session_id, refresh_token)
+        }
+
+    except InvalidRefreshToken:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+
+    except (HTTPException, UpstreamUnavailable):
+        raise
+
+    except Exception as e:
+        print("REFRESH ERROR:", e)
+        traceback.print_exc()
+
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+
+@router.post("/logout")
+async def logout(data: RefreshRequest):
+    """
+    End the session: its refresh token and every access token issued from it.
+    """
+    if session_manager.enabled:
+        try:
+            await session_manager.revoke(data.refreshToken)
+        except InvalidRefreshToken:
+            pass
+
+    return {"success": True}
+
+
 # ================= MY ORDERS =================
 
 @router.get("/my-orders")
-def get_my_orders(token: str):
+async def get_my_orders(
+    request: Request,
+    claims: dict = Depends(get_token_or_query_claims),
+    fields: str | None = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
+    selected = parse_fields(fields, FULL_FIELDS)
+
+    cached = response_cache.lookup(request, claims["userId"])
+    if cached:
+        return cached
+    version = response_cache.version(claims["userId"])
+
     try:
-        payload = decode_access_token(token)
-
-        user_id = payload.get("userId")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid token")
-
-        orders = tablesDB.list_rows(
-            database_id=DATABASE_ID,
-            table_id=ORDERS_COLLECTION_ID,
-            queries=[
-                Query.equal("userId", user_id),
-                Query.order_desc("$createdAt")
-            ]
-        )
+        with allow_stale() as reads:
+            history = await get_order_history(claims["userId"], selected, cursor, limit)
 
-        return {
+        content = {
             "success": True,
-            "orders": _safe_get(orders, "rows") or []
+            **history,
+            "stale": reads.served
         }
+        if reads.served:
+            return OrjsonResponse(content)
+        return response_cache.store(request, claims["userId"], version, content)
+
+    except (HTTPException, UpstreamUnavailable):
+        raise
 
     except Exception as e:
         print("MY ORDERS ERROR:", e)
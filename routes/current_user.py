@@ -1,68 +1,62 @@
 from fastapi import APIRouter, Request, HTTPException
-from appwrite_client import tablesDB, _safe_get
-from appwrite.query import Query
-import os
+from db.resilience import UpstreamUnavailable, allow_stale
+from services.order_history import parse_fields, DEFAULT_PAGE_SIZE, SUMMARY_FIELDS
+from services.user_snapshot import get_user_snapshot
+from utils.response_cache import response_cache
+from utils.responses import OrjsonResponse
 
 router = APIRouter(prefix="/user", tags=["User"])
 
-DATABASE_ID = os.getenv("DATABASE_ID")
-USERS_COLLECTION_ID = os.getenv("USERS_COLLECTION_ID")
-ORDERS_COLLECTION_ID = os.getenv("ORDERS_COLLECTION_ID")
-
 @router.get("/current")
-def current_user(request: Request):
+async def current_user(
+    request: Request,
+    fields: str | None = None,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE
+):
     """
     Optional route for guest fallback using cookies
     """
+    selected = parse_fields(fields, SUMMARY_FIELDS)
+
     user_id = request.cookies.get("user_id")
     if not user_id:
         return {"status": "guest"}
 
+    cached = response_cache.lookup(request, user_id)
+    if cached:
+        return cached
+    version = response_cache.version(user_id)
+
     try:
-        users = tablesDB.list_rows(
-            database_id=DATABASE_ID,
-            table_id=USERS_COLLECTION_ID,
-            queries=[Query.equal("$id", user_id)]
-        )
-        
-        user_rows = _safe_get(users, "rows") or _safe_get(users, "documents") or []
-        if not user_rows:
+        # User row and orders are read in parallel; last good copies if Appwrite is failing
+        with allow_stale() as reads:
+            snapshot = await get_user_snapshot(user_id, selected, cursor, limit)
+        if not snapshot:
             return {"status": "guest"}
 
-        user = user_rows[0]
-
-        # Fetch past orders
-        try:
-            orders_resp = tablesDB.list_rows(
-                database_id=DATABASE_ID,
-                table_id=ORDERS_COLLECTION_ID,
-                queries=[Query.equal("userId", user_id)]
-            )
-            
-            order_rows = _safe_get(orders_resp, "rows") or _safe_get(orders_resp, "documents") or []
-            orders_list = [
-                {
-                    "id": _safe_get(o, "$id"),
-                    "items": _safe_get(o, "items", []),
-                    "total": _safe_get(o, "total", 0),
-                    "status": _safe_get(o, "status", "Pending")
-                } for o in order_rows
-            ]
-        except Exception:
-            orders_list = []
-
-        return {
+        user = snapshot.user
+        content = {
             "status": "user",
             "user": {
-                "id": _safe_get(user, "$id"),
-                "name": _safe_get(user, "name", "User"),
-                "email": _safe_get(user, "email", ""),
-                "mobile": _safe_get(user, "mobile", ""),
-                "role": _safe_get(user, "role", "user")
+                "id": user.id,
+                "name": user.name or "User",
+                "email": user.email or "",
+                "mobile": user.mobile or "",
+                "role": user.role or "user"
             },
-            "orders": orders_list
+            **snapshot.history,
+            "partial": snapshot.partial,
+            "stale": reads.served
         }
 
+        if snapshot.partial or reads.served:
+            return OrjsonResponse(content)
+        return response_cache.store(request, user_id, version, content)
+
+    except UpstreamUnavailable:
+        raise
+
     except Exception as e:
         print("CURRENT USER ERROR:", e)
         raise HTTPException(status_code=500, detail="Server error")
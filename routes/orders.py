@@ -1,73 +1,232 @@
-from fastapi import APIRouter, HTTPException, Header, Body
-from appwrite_client import tablesDB, _safe_get
-from auth.deps import get_user_from_token
-import os, uuid
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from appwrite.exception import AppwriteException
+from auth.deps import get_optional_claims, get_token_or_query_claims, require_admin
+from db.orders import orders as orders_repo
+from db.resilience import UpstreamUnavailable
+from services.catalog import catalog, UnknownProducts
+from services.order_data import OrderRequest, build_order_data
+from services.order_events import order_events, TooManySubscribers
+from services.order_import import order_importer, ImportBusy, IMPORT_FORMATS
+from services.order_queue import order_queue
+from services.order_history import parse_fields, FULL_FIELDS
+from services.order_export import export_queries, stream_orders, EXPORT_MEDIA_TYPES
+import hashlib
+import orjson
+import uuid
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
-DATABASE_ID = os.getenv("DATABASE_ID")
-ORDERS_COLLECTION_ID = os.getenv("ORDERS_COLLECTION_ID")
+# Namespace for deriving row ids from Idempotency-Key headers
+IDEMPOTENCY_NAMESPACE = uuid.UUID("5b0d6c2e-8f3a-4e0b-9a57-3c1f2d7e9a41")
 
 
+def order_row_id(idempotency_key: str | None, user_id: str | None, email: str | None = None) -> str:
+    """
+    Same key (per user, or per email for guests) -> same row id, so client
+    retries can't duplicate an order.
+    """
+    if not idempotency_key:
+        return str(uuid.uuid4())
+
+    scope = user_id or f"guest:{(email or '').strip().lower()}"
+    return str(uuid.uuid5(IDEMPOTENCY_NAMESPACE, f"{scope}:{idempotency_key}"))
+
+
+def request_fingerprint(order: OrderRequest) -> str:
+    """
+    Digest of the request body, to tell a retry from a reused Idempotency-Key.
+    """
+    body = orjson.dumps(order.model_dump(mode="json"), option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(body).hexdigest()
+
+
+# ================= MODELS =================
+
+class StatusUpdate(BaseModel):
+    status: Literal["Pending", "Confirmed", "Shipped", "Out for delivery", "Delivered", "Cancelled"]
+
+
+# ================= CREATE =================
+
 @router.post("/")
-def create_order(
-    order: dict = Body(...),
-    authorization: str | None = Header(None)
+async def create_order(
+    order: OrderRequest,
+    claims: dict | None = Depends(get_optional_claims),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key")
 ):
     try:
         user_id = None
-        email = order.get("email")
+        email = order.email
         is_guest = True
 
         # ✅ Handle logged-in user
-        if authorization:
-            token = authorization.replace("Bearer ", "")
-            user = get_user_from_token(token)
-
-            if user:
-                user_id = _safe_get(user, "$id")
-                email = _safe_get(user, "email")
-                is_guest = False
-
-        address = order.get("address", {})
+        # Token already carries id + email; no user lookup needed
+        if claims:
+            user_id = claims["userId"]
+            email = claims.get("email") or email
+            is_guest = False
 
-        # ✅ Prepare clean data
-        order_data = {
-            "email": email,
-            "isGuest": is_guest,
-            "userId": user_id,
-            "name": order.get("name"),
-            "country": address.get("country"),
-            "state": address.get("state"),
-            "city": address.get("city"),
-            "street": address.get("street"),
-            "pincode": address.get("pincode"),
-            "phone": order.get("phone"),
-            "paymentMethod": order.get("paymentMethod", "COD"),
-
-            # 🔥 FIXED: store items as ARRAY (not string)
-            "items": order.get("items", []),
-
-            # 🔥 FIXED: ensure number format
-            "total": float(order.get("total", 0)),
-
-            "status": "Pending"
-        }
+        if catalog.enabled and not catalog.ready:
+            raise HTTPException(
+                status_code=503,
+                detail="Catalog loading, please retry",
+                headers={"Retry-After": "2"}
+            )
 
-        # ✅ Save to Appwrite
-        tablesDB.create_row(
-            database_id=DATABASE_ID,
-            table_id=ORDERS_COLLECTION_ID,
-            row_id=str(uuid.uuid4()),
-            data=order_data
-        )
+        # ✅ Prepare clean data (priced from the catalog when configured)
+        try:
+            order_data = build_order_data(order, user_id, email)
+        except UnknownProducts as e:
+            raise HTTPException(status_code=400, detail=f"Unknown or unavailable products: {e}")
+        # ✅ Spool locally; the write queue saves it to Appwrite with retries
+        order_id = order_row_id(idempotency_key, user_id, email)
+        fingerprint = request_fingerprint(order)
+        if not order_queue.submit(order_id, order_data, fingerprint):
+            # Retry of an earlier request: answer with the order stored then
+            stored = order_queue.lookup(order_id)
+            if stored:
+                stored_data, stored_fingerprint = stored
+                if stored_fingerprint and stored_fingerprint != fingerprint:
+                    raise HTTPException(
+                        status_code=422,
+                        detail="Idempotency-Key was already used for a different order"
+                    )
+                order_data = stored_data
+        total = order_data["total"]
 
         return {
             "success": True,
             "isGuest": is_guest,
+            "orderId": order_id,
+            "total": total,
             "message": "Order placed successfully"
         }
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         print("ORDER ERROR:", e)
-        raise HTTPException(status_code=500, detail="Order failed")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Order failed")
+
+
+# ================= ADMIN EXPORT =================
+
+@router.get("/export")
+async def export_orders(
+    claims: dict = Depends(require_admin),
+    format: str = "ndjson",             # ndjson | csv
+    since: datetime | None = None,      # $createdAt >= since
+    until: datetime | None = None,      # $createdAt < until
+    status: str | None = None,          # Comma-separated statuses
+    fields: str | None = None
+):
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+    selected = parse_fields(fields, FULL_FIELDS)
+    statuses = [s.strip() for s in status.split(",") if s.strip()] if status else None
+
+    return StreamingResponse(
+        stream_orders(export_queries(since, until, statuses), selected, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'}
+    )
+
+
+# ================= ADMIN BULK IMPORT =================
+
+@router.post("/import")
+async def import_orders(
+    request: Request,
+    claims: dict = Depends(require_admin),
+    # Chosen by the client, so an upload cut off mid-way can be resumed
+    # by sending the file again under the same id
+    importId: str = Query(min_length=1, max_length=64, pattern=r"^[A-Za-z0-9._-]+$"),
+    format: str | None = None           # csv | ndjson (default: from Content-Type)
+):
+    """
+    Stream a CSV/NDJSON file of orders (one create_order body per row; CSV
+    takes flat address columns and `items` as a JSON array) into Appwrite.
+    Rows up to the import's last committed batch are skipped on a re-upload.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").partition(";")[0].strip()
+        format = "csv" if content_type == IMPORT_FORMATS["csv"] else "ndjson"
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    if catalog.enabled and not catalog.ready:
+        raise HTTPException(status_code=503, detail="Catalog loading, please retry", headers={"Retry-After": "2"})
+
+    try:
+        report = await order_importer.run(importId, format, request.stream())
+    except ImportBusy:
+        raise HTTPException(status_code=409, detail="This import is already running")
+
+    return {"success": report["status"] == "done", **report}
+
+
+@router.get("/import/{import_id}")
+async def import_report(
+    import_id: str,
+    claims: dict = Depends(require_admin),
+    offset: int = 0,
+    limit: int = 100
+):
+    report = order_importer.report(import_id, max(0, offset), max(1, min(limit, 1000)))
+    if report is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return report
+
+
+# ================= STATUS EVENTS =================
+
+@router.get("/events")
+async def order_status_events(
+    claims: dict = Depends(get_token_or_query_claims)  # EventSource can't send headers: ?token=
+):
+    """
+    Server-Sent Events stream of the caller's order status changes,
+    replacing polling of /auth/my-orders.
+    """
+    try:
+        order_events.check_capacity(claims["userId"])
+    except TooManySubscribers:
+        raise HTTPException(status_code=503, detail="Too many open streams", headers={"Retry-After": "30"})
+
+    return StreamingResponse(
+        order_events.stream(claims["userId"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.patch("/{order_id}/status")
+async def update_order_status(
+    order_id: str,
+    update: StatusUpdate,
+    claims: dict = Depends(require_admin)
+):
+    try:
+        order = await orders_repo.update_status(order_id, update.status)
+    except UpstreamUnavailable:
+        raise
+    except AppwriteException as e:
+        if e.code == 404:
+            raise HTTPException(status_code=404, detail="Order not found")
+        print("ORDER STATUS ERROR:", e)
+        raise HTTPException(status_code=500, detail="Status update failed")
+
+    # ✅ Push to the customer's open streams
+    order_events.publish(order.userId, "status", {
+        "orderId": order.id,
+        "status": order.status,
+        "updatedAt": order.updatedAt
+    })
+
+    return {"success": True, "orderId": order.id, "status": order.status}
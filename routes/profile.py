@@ -1,96 +1,90 @@
-from fastapi import APIRouter, Header, HTTPException
-from jose import jwt
-import os
-from appwrite_client import tablesDB, _safe_get
+from fastapi import APIRouter, Depends, HTTPException, Request
 from appwrite.query import Query
+from auth.deps import get_optional_claims
+from db.mirror import read_mirror
+from db.resilience import UpstreamUnavailable, allow_stale
+from db.users import users as users_repo
+from services.order_history import parse_fields, DEFAULT_PAGE_SIZE, SUMMARY_FIELDS
+from services.user_snapshot import get_user_snapshot, get_snapshot_for
+from utils.response_cache import response_cache
+from utils.responses import OrjsonResponse
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
-SECRET = os.getenv("JWT_SECRET")
-DATABASE_ID = os.getenv("DATABASE_ID")
-USERS_COLLECTION_ID = os.getenv("USERS_COLLECTION_ID")
-ORDERS_COLLECTION_ID = os.getenv("ORDERS_COLLECTION_ID")
-
 @router.get("/")
-def get_profile(
-    authorization: str = Header(None),  # Optional JWT
+async def get_profile(
+    request: Request,
+    claims: dict | None = Depends(get_optional_claims),  # Optional JWT
     email: str = None,                  # Optional fallback
-    mobile: str = None                  # Optional fallback
+    mobile: str = None,                 # Optional fallback
+    fields: str | None = None,          # Order fields to return
+    cursor: str | None = None,          # Order id to continue after
+    limit: int = DEFAULT_PAGE_SIZE
 ):
+    selected = parse_fields(fields, SUMMARY_FIELDS)
+
     try:
-        user = None
+        snapshot = None
+
+        # 1️⃣ Try JWT token first (user + orders fetched in parallel)
+        if claims:
+            # Unchanged since the last load: 304 / cached body, no Appwrite reads
+            cached = response_cache.lookup(request, claims["userId"])
+            if cached:
+                return cached
+            version = response_cache.version(claims["userId"])
 
-        # 1️⃣ Try JWT token first
-        if authorization:
             try:
-                token = authorization.split(" ")[1]
-                payload = jwt.decode(token, SECRET, algorithms=["HS256"])
-                user_id = payload["userId"]  # Adjusted to match auth.py token payload
-                user_resp = tablesDB.get_row(
-                    database_id=DATABASE_ID,
-                    table_id=USERS_COLLECTION_ID,
-                    row_id=user_id
-                )
-                user = user_resp
+                # Appwrite failing: last good user/orders instead of an error
+                with allow_stale() as reads:
+                    snapshot = await get_user_snapshot(claims["userId"], selected, cursor, limit)
+            except UpstreamUnavailable:
+                raise
             except Exception as e:
-                print("JWT decoding error:", e)
-                user = None
+                print("PROFILE USER FETCH ERROR:", e)
+                snapshot = None
 
         # 2️⃣ Fallback: find by email or mobile
-        if not user and (email or mobile):
+        if not snapshot and (email or mobile):
             queries = []
             if email:
                 queries.append(Query.equal("email", email))
             if mobile:
                 queries.append(Query.equal("mobile", mobile))
 
-            users_resp = tablesDB.list_rows(
-                database_id=DATABASE_ID,
-                table_id=USERS_COLLECTION_ID,
-                queries=queries
-            )
-
-            user_docs = _safe_get(users_resp, "rows") or _safe_get(users_resp, "documents") or []
-            if user_docs:
-                user = user_docs[0]
+            with allow_stale() as reads:
+                user = read_mirror.find_user(email, mobile) if read_mirror.serves() else None
+                user = user or await users_repo.find_one(*queries)
+                if user:
+                    snapshot = await get_snapshot_for(user, selected, cursor, limit)
 
         # 3️⃣ If still no user, raise error
-        if not user:
+        if not snapshot:
             raise HTTPException(status_code=404, detail="User not found")
 
-        # Fetch past orders for this user
-        try:
-            orders_resp = tablesDB.list_rows(
-                database_id=DATABASE_ID,
-                table_id=ORDERS_COLLECTION_ID,
-                queries=[Query.equal("userId", _safe_get(user, "$id"))]
-            )
-            
-            order_rows = _safe_get(orders_resp, "rows") or _safe_get(orders_resp, "documents") or []
-            orders_list = [
-                {
-                    "id": _safe_get(o, "$id"),
-                    "items": _safe_get(o, "items", []),
-                    "total": _safe_get(o, "total", 0),
-                    "status": _safe_get(o, "status", "Pending")
-                }
-                for o in order_rows
-            ]
-        except Exception:
-            orders_list = []
-
-        return {
+        user = snapshot.user
+        content = {
             "success": True,
             "user": {
-                "id": _safe_get(user, "$id"),
-                "name": _safe_get(user, "name", ""),
-                "email": _safe_get(user, "email", ""),
-                "mobile": _safe_get(user, "mobile", ""),
-                "role": _safe_get(user, "role", "user")
+                "id": user.id,
+                "name": user.name or "",
+                "email": user.email or "",
+                "mobile": user.mobile or "",
+                "role": user.role or "user"
             },
-            "orders": orders_list
+            **snapshot.history,
+            "partial": snapshot.partial,
+            "stale": reads.served
         }
 
+        # Only cache complete, fresh responses for the token's own user
+        if claims and user.id == claims["userId"] and not snapshot.partial and not reads.served:
+            return response_cache.store(request, user.id, version, content)
+        return OrjsonResponse(content)
+
+    except UpstreamUnavailable:
+        raise
+
     except Exception as e:
         print("PROFILE ERROR:", e)
         raise HTTPException(status_code=401, detail="Invalid or missing token")
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import time
+from db.products import products as products_repo
+from db.records import Product
+
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "300"))
+CATALOG_PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", "500"))
+# How long startup waits for the first load before serving (checkout answers 503 until then)
+CATALOG_STARTUP_TIMEOUT = float(os.getenv("CATALOG_STARTUP_TIMEOUT", "5"))
+
+
+class UnknownProducts(Exception):
+    def __init__(self, product_ids: list[str]):
+        super().__init__(", ".join(product_ids))
+        self.product_ids = product_ids
+
+
+class ProductCatalog:
+    """
+    In-memory product id -> Product index, loaded from the products table
+    and reloaded every CATALOG_REFRESH_INTERVAL seconds.
+
+    A reload builds a new dict and swaps it in whole, so pricing never sees
+    a half-loaded catalog; `version` increases whenever the contents change.
+    Pricing an order is one dict lookup per item.
+    """
+
+    def __init__(self, refresh_interval: float, page_size: int):
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self.products: dict[str, Product] | None = None
+        self.version = 0
+        self.loaded_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(products_repo.table_id)
+
+    @property
+    def ready(self) -> bool:
+        return self.products is not None
+
+    # ================= LIFECYCLE =================
+
+    async def start(self):
+        if not self.enabled:
+            print("CATALOG: PRODUCTS_COLLECTION_ID not set, orders keep client-side prices")
+            return
+
+        try:
+            await asyncio.wait_for(self.refresh(), timeout=CATALOG_STARTUP_TIMEOUT)
+        except Exception as e:
+            print("CATALOG LOAD ERROR:", repr(e))
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            # Retry quickly until the first load succeeds
+            await asyncio.sleep(self.refresh_interval if self.ready else min(self.refresh_interval, 5))
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Keep serving the last good catalog
+                print("CATALOG REFRESH ERROR:", e)
+
+    async def refresh(self):
+        index: dict[str, Product] = {}
+        async for page in products_repo.iter_pages(page_size=self.page_size):
+            for product in page:
+                index[product.id] = product
+
+        if self.products is None or self._signature(index) != self._signature(self.products):
+            self.version += 1
+        self.products = index
+        self.loaded_at = time.time()
+
+    @staticmethod
+    def _signature(index: dict[str, Product]) -> set:
+        return {(p.id, p.name, p.price, p.active) for p in index.values()}
+
+    # ================= PRICING =================
+
+    def price(self, items: list[tuple[str, int]]) -> tuple[list[dict], float]:
+        """
+        Order lines and total from catalog prices for (product id, quantity) pairs.
+        Raises UnknownProducts for ids that are missing or inactive.
+        """
+        products = self.products
+        lines, missing = [], []
+        total = 0.0
+
+        for product_id, qty in items:
+            product = products.get(product_id)
+            if product is None or not product.active:
+                missing.append(product_id)
+                continue
+
+            lines.append({"id": product.id, "name": product.name, "qty": qty, "price": product.price})
+            total += product.price * qty
+
+        if missing:
+            raise UnknownProducts(missing)
+
+        return lines, round(total, 2)
+
+
+catalog = ProductCatalog(CATALOG_REFRESH_INTERVAL, CATALOG_PAGE_SIZE)
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import sqlite3
+import time
+from db.orders import orders as orders_repo
+
+CLAIM_CONCURRENCY = int(os.getenv("GUEST_CLAIM_CONCURRENCY", "8"))
+CLAIM_BATCH_SIZE = int(os.getenv("GUEST_CLAIM_BATCH_SIZE", "100"))
+CLAIM_MAX_ATTEMPTS = int(os.getenv("GUEST_CLAIM_MAX_ATTEMPTS", "3"))
+CLAIM_BACKOFF = float(os.getenv("GUEST_CLAIM_BACKOFF", "0.5"))
+
+# Same file as the order spool, so the spool records a guest write and its
+# "needs claiming" marker in one transaction
+GUEST_CLAIM_PATH = os.getenv("ORDER_SPOOL_PATH", "order_spool.sqlite3")
+# A "claimed" marker older than this is ignored and the claim query runs again
+GUEST_CLAIM_TTL = float(os.getenv("GUEST_CLAIM_CACHE_TTL", "86400"))
+
+GUEST_CLAIMS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS guest_claims (
+    email TEXT PRIMARY KEY,
+    claimed_at REAL,
+    written_at REAL
+)
+"""
+NOTE_GUEST_WRITE = (
+    "INSERT INTO guest_claims (email, written_at) VALUES (?, ?)"
+    " ON CONFLICT (email) DO UPDATE SET written_at = excluded.written_at"
+)
+
+_in_progress: set[str] = set()
+
+
+class ClaimState:
+    """
+    Per-email "guest orders already claimed" markers, in a SQLite file shared
+    by the workers on a host, so a guest checkout handled by any worker makes
+    the next login (on any worker) claim again.
+
+    An email counts as claimed when a claim pass that started after its last
+    guest write found nothing left; a write racing a claim pass therefore
+    keeps it unclaimed. Without a started store every login claims.
+    """
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._db: sqlite3.Connection | None = None
+        self._pruned_at = 0.0
+
+    async def start(self):
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(GUEST_CLAIMS_SCHEMA)
+
+    async def stop(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def is_claimed(self, email: str) -> bool:
+        if self._db is None or not email:
+            return False
+        row = self._db.execute(
+            "SELECT claimed_at, written_at FROM guest_claims WHERE email = ?", (email,)
+        ).fetchone()
+        if row is None or row[0] is None or time.time() - row[0] > self.ttl:
+            return False
+        return row[1] is None or row[0] > row[1]
+
+    def mark_claimed(self, email: str, since: float):
+        """
+        A claim pass that started at `since` left no guest orders for `email`.
+        """
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT INTO guest_claims (email, claimed_at) VALUES (?, ?)"
+            " ON CONFLICT (email) DO UPDATE SET claimed_at = MAX(COALESCE(claimed_at, 0), excluded.claimed_at)",
+            (email, since)
+        )
+        if since - self._pruned_at > 3600:
+            self._pruned_at = since
+            self._db.execute(
+                "DELETE FROM guest_claims WHERE MAX(COALESCE(claimed_at, 0), COALESCE(written_at, 0)) < ?",
+                (since - self.ttl,)
+            )
+
+    def mark_unclaimed(self, email: str):
+        if self._db is not None and email:
+            self._db.execute(NOTE_GUEST_WRITE, (email, time.time()))
+
+
+claim_state = ClaimState(GUEST_CLAIM_PATH, GUEST_CLAIM_TTL)
+
+
+def is_claimed(email: str) -> bool:
+    return claim_state.is_claimed(email)
+
+
+def mark_unclaimed(email: str):
+    """
+    Call after a guest checkout so the next login for this email, on any
+    worker, claims it.
+    """
+    claim_state.mark_unclaimed(email)
+
+
+async def _claim_batch(order_ids: list[str], user_id: str) -> int:
+    semaphore = asyncio.Semaphore(CLAIM_CONCURRENCY)
+
+    async def claim_one(order_id: str):
+        async with semaphore:
+            await orders_repo.claim(order_id, user_id)
+
+    results = await asyncio.gather(
+        *(claim_one(order_id) for order_id in order_ids),
+        return_exceptions=True
+    )
+    return sum(1 for r in results if isinstance(r, Exception))
+
+
+async def claim_guest_orders(email: str, user_id: str):
+    """
+    Attach every guest order placed with `email` to `user_id`.
+    Idempotent: claimed orders drop out of the isGuest query, so a retry
+    (or a second login) only touches what is still unclaimed.
+    """
+    if not email or is_claimed(email) or email in _in_progress:
+        return
+
+    _in_progress.add(email)
+    attempt = 0
+    try:
+        while True:
+            started = time.time()
+            try:
+                guest_orders = await orders_repo.list_guest_orders(email, limit=CLAIM_BATCH_SIZE)
+                if not guest_orders:
+                    claim_state.mark_claimed(email, started)
+                    return
+
+                failed = await _claim_batch([o.id for o in guest_orders], user_id)
+            except Exception as e:
+                print("GUEST CLAIM ERROR:", e)
+                failed = 1
+
+            if failed:
+                attempt += 1
+                if attempt >= CLAIM_MAX_ATTEMPTS:
+                    print(f"GUEST CLAIM GAVE UP: {email} ({failed} orders pending)")
+                    return
+                await asyncio.sleep(CLAIM_BACKOFF * 2 ** (attempt - 1))
+    finally:
+        _in_progress.discard(email)
@@ -0,0 +1,371 @@
+import asyncio
+import json
+import os
+import sqlite3
+from appwrite.query import Query
+from db.orders import orders as orders_repo
+
+ANALYTICS_PATH = os.getenv("ORDER_ANALYTICS_PATH", "order_analytics.sqlite3")
+ANALYTICS_REFRESH_INTERVAL = float(os.getenv("ORDER_ANALYTICS_REFRESH_INTERVAL", "60"))
+ANALYTICS_PAGE_SIZE = int(os.getenv("ORDER_ANALYTICS_PAGE_SIZE", "500"))
+
+# Groupings served from the rollup; "day" is the per-day total row
+DIMENSIONS = ("state", "city", "paymentMethod")
+GROUPS = ("day", *DIMENSIONS)
+ROLLUP_COLUMNS = ["total", "items", *DIMENSIONS]
+UNKNOWN = "Unknown"
+
+
+def _items(order) -> list[dict]:
+    items = []
+    for item in order.items or []:
+        # Older orders stored items as JSON strings
+        if isinstance(item, str):
+            try:
+                item = json.loads(item)
+            except ValueError:
+                continue
+        if isinstance(item, dict):
+            items.append(item)
+    return items
+
+
+def _grouped(keys, weights) -> tuple:
+    """
+    Unique key rows with their row counts and summed weights.
+    """
+    import numpy as np
+
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    return unique, np.bincount(inverse), np.bincount(inverse, weights=weights)
+
+
+def aggregate(orders: list) -> tuple[list[tuple], list[tuple], list[tuple]]:
+    """
+    Columnar rollup of a batch of orders.
+
+    Returns (day, dimension, value, orders, revenue) rows, with dimension ""
+    for the per-day totals, (day, item id, name, quantity, revenue) rows,
+    and the same item rows per dimension value:
+    (day, dimension, value, item id, name, quantity, revenue).
+    """
+    if not orders:
+        return [], [], []
+
+    # Imported here: only the background refresh needs NumPy, not startup
+    import numpy as np
+
+    days = np.array([(o.createdAt or "")[:10] for o in orders])
+    totals = np.array([float(o.total or 0) for o in orders])
+
+    rollups = []
+    unique, counts, revenue = _grouped(days[:, None], totals)
+    rollups += [(key[0], "", "", int(n), float(r)) for key, n, r in zip(unique, counts, revenue)]
+
+    dimension_values = {}
+    for dimension in DIMENSIONS:
+        values = dimension_values[dimension] = np.array([getattr(o, dimension) or UNKNOWN for o in orders])
+        unique, counts, revenue = _grouped(np.stack([days, values], axis=1), totals)
+        rollups += [(key[0], dimension, key[1], int(n), float(r)) for key, n, r in zip(unique, counts, revenue)]
+
+    # One entry per line item, with the index of the order it belongs to
+    item_orders, item_ids, quantities, prices, names = [], [], [], [], {}
+    for index, order in enumerate(orders):
+        for item in _items(order):
+            item_id = str(item.get("id") or item.get("name") or UNKNOWN)
+            item_orders.append(index)
+            item_ids.append(item_id)
+            quantities.append(float(item.get("qty", item.get("quantity", 1)) or 0))
+            prices.append(float(item.get("price") or 0))
+            names[item_id] = item.get("name") or item_id
+
+    item_rollups, item_dimension_rollups = [], []
+    if item_ids:
+        item_orders = np.array(item_orders)
+        item_ids = np.array(item_ids)
+        quantities = np.array(quantities)
+        line_revenue = quantities * np.array(prices)
+        item_days = days[item_orders]
+
+        unique, qty, revenue = _item_sums(np.stack([item_days, item_ids], axis=1), quantities, line_revenue)
+        item_rollups = [
+            (key[0], key[1], names[key[1]], float(q), float(r))
+            for key, q, r in zip(unique, qty, revenue)
+        ]
+
+        for dimension, values in dimension_values.items():
+            keys = np.stack([item_days, values[item_orders], item_ids], axis=1)
+            unique, qty, revenue = _item_sums(keys, quantities, line_revenue)
+            item_dimension_rollups += [
+                (key[0], dimension, key[1], key[2], names[key[2]], float(q), float(r))
+                for key, q, r in zip(unique, qty, revenue)
+            ]
+
+    return rollups, item_rollups, item_dimension_rollups
+
+
+def _item_sums(keys, quantities, line_revenue) -> tuple:
+    """
+    Unique key rows with their summed quantities and revenue.
+    """
+    import numpy as np
+
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    return unique, np.bincount(inverse, weights=quantities), np.bincount(inverse, weights=line_revenue)
+
+
+class OrderAnalytics:
+    """
+    Incrementally maintained order rollups in a local SQLite file.
+
+    refresh() reads only orders created since the stored checkpoint
+    ($createdAt plus the ids already counted at that timestamp), aggregates
+    each page with NumPy and adds it to per-day rollups. Each page and its
+    new checkpoint are committed together, and a page is dropped if the
+    checkpoint moved meanwhile (another worker sharing the file got there
+    first), so nothing is counted twice. Reads are plain SQL over the rollups.
+    Item rollups are also kept per state/city/paymentMethod value, so top
+    items can be narrowed the same way as the summary is grouped.
+
+    Later edits to an order (e.g. status changes) are not picked up
+    incrementally; rebuild() recomputes everything from scratch.
+    """
+
+    def __init__(self, path: str, refresh_interval: float, page_size: int):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self._db: sqlite3.Connection | None = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    # ================= LIFECYCLE =================
+
+    async def start(self):
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Files from before the per-dimension item rollup are recomputed from scratch
+        outdated = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'checkpoint'"
+            " AND NOT EXISTS (SELECT 1 FROM sqlite_master WHERE name = 'item_dimension_rollup')"
+        ).fetchone()
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rollup (
+                day TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                value TEXT NOT NULL,
+                orders INTEGER NOT NULL,
+                revenue REAL NOT NULL,
+                PRIMARY KEY (day, dimension, value)
+            );
+            CREATE TABLE IF NOT EXISTS item_rollup (
+                day TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                name TEXT,
+                quantity REAL NOT NULL,
+                revenue REAL NOT NULL,
+                PRIMARY KEY (day, item_id)
+            );
+            CREATE TABLE IF NOT EXISTS item_dimension_rollup (
+                day TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                value TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                name TEXT,
+                quantity REAL NOT NULL,
+                revenue REAL NOT NULL,
+                PRIMARY KEY (dimension, value, day, item_id)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                created_at TEXT NOT NULL,
+                order_ids TEXT NOT NULL
+            );
+            """
+        )
+        if outdated:
+            self._clear()
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print("ANALYTICS REFRESH ERROR:", e)
+            await asyncio.sleep(self.refresh_interval)
+
+    # ================= INGEST =================
+
+    def checkpoint(self) -> tuple[str | None, list[str]]:
+        row = self._db.execute("SELECT created_at, order_ids FROM checkpoint WHERE id = 1").fetchone()
+        if row is None:
+            return None, []
+        return row[0], json.loads(row[1])
+
+    def _commit_page(self, orders: list, expected: tuple, checkpoint: tuple) -> bool:
+        rollups, item_rollups, item_dimension_rollups = aggregate(orders)
+
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            if self.checkpoint() != expected:
+                self._db.execute("ROLLBACK")
+                return False
+
+            self._db.executemany(
+                """
+                INSERT INTO rollup (day, dimension, value, orders, revenue) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (day, dimension, value) DO UPDATE SET
+                    orders = orders + excluded.orders, revenue = revenue + excluded.revenue
+                """,
+                rollups
+            )
+            self._db.executemany(
+                """
+                INSERT INTO item_rollup (day, item_id, name, quantity, revenue) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (day, item_id) DO UPDATE SET
+                    name = excluded.name,
+                    quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue
+                """,
+                item_rollups
+            )
+            self._db.executemany(
+                """
+                INSERT INTO item_dimension_rollup (day, dimension, value, item_id, name, quantity, revenue)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (dimension, value, day, item_id) DO UPDATE SET
+                    name = excluded.name,
+                    quantity = quantity + excluded.quantity, revenue = revenue + excluded.revenue
+                """,
+                item_dimension_rollups
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoint (id, created_at, order_ids) VALUES (1, ?, ?)",
+                (checkpoint[0], json.dumps(checkpoint[1]))
+            )
+            self._db.execute("COMMIT")
+            return True
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    async def refresh(self) -> int:
+        """
+        Fold orders created since the checkpoint into the rollups.
+        Returns how many orders were added.
+        """
+        async with self._lock:
+            since, seen = self.checkpoint()
+            queries = [Query.order_asc("$createdAt"), Query.select(ROLLUP_COLUMNS)]
+            if since:
+                # >= plus the seen ids: orders can share a millisecond timestamp
+                queries.insert(0, Query.greater_than_equal("$createdAt", since))
+
+            added = 0
+            async for page in orders_repo.iter_pages(*queries, page_size=self.page_size):
+                fresh = [o for o in page if not (o.createdAt == since and o.id in seen)]
+
+                last = page[-1].createdAt
+                at_last = [o.id for o in page if o.createdAt == last]
+                checkpoint = (last, seen + at_last if last == since else at_last)
+
+                if not self._commit_page(fresh, (since, seen), checkpoint):
+                    break
+                since, seen = checkpoint
+                added += len(fresh)
+
+            return added
+
+    async def rebuild(self) -> int:
+        """
+        Drop every rollup and recompute from the full orders table.
+        """
+        async with self._lock:
+            self._clear()
+        return await self.refresh()
+
+    def _clear(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        self._db.execute("DELETE FROM rollup")
+        self._db.execute("DELETE FROM item_rollup")
+        self._db.execute("DELETE FROM item_dimension_rollup")
+        self._db.execute("DELETE FROM checkpoint")
+        self._db.execute("COMMIT")
+
+    # ================= QUERIES =================
+
+    @staticmethod
+    def _day_range(since: str | None, until: str | None) -> tuple[str, list]:
+        clauses, params = [], []
+        if since:
+            clauses.append("day >= ?")
+            params.append(since)
+        if until:
+            clauses.append("day <= ?")
+            params.append(until)
+        return "".join(f" AND {c}" for c in clauses), params
+
+    def summary(self, group: str, since: str | None = None, until: str | None = None) -> list[dict]:
+        """
+        Orders and revenue per day or per state/city/paymentMethod, for days in [since, until].
+        """
+        where, params = self._day_range(since, until)
+        if group == "day":
+            sql = f"SELECT day, orders, revenue FROM rollup WHERE dimension = ''{where} ORDER BY day"
+        else:
+            sql = (
+                f"SELECT value, SUM(orders), SUM(revenue) FROM rollup WHERE dimension = ?{where}"
+                " GROUP BY value ORDER BY SUM(revenue) DESC"
+            )
+            params = [group, *params]
+
+        return [
+            {"key": key, "orders": orders, "revenue": round(revenue, 2)}
+            for key, orders, revenue in self._db.execute(sql, params)
+        ]
+
+    def top_items(
+        self,
+        since: str | None = None,
+        until: str | None = None,
+        limit: int = 10,
+        sort: str = "revenue",
+        dimension: str | None = None,
+        value: str | None = None
+    ) -> list[dict]:
+        """
+        Best-selling items for days in [since, until], optionally only from
+        orders whose state/city/paymentMethod (`dimension`) is `value`.
+        """
+        where, params = self._day_range(since, until)
+        order_by = "SUM(quantity)" if sort == "quantity" else "SUM(revenue)"
+        if dimension:
+            table = "item_dimension_rollup WHERE dimension = ? AND value = ?"
+            params = [dimension, value, *params]
+        else:
+            table = "item_rollup WHERE 1 = 1"
+        rows = self._db.execute(
+            f"SELECT item_id, MAX(name), SUM(quantity), SUM(revenue) FROM {table}{where}"
+            f" GROUP BY item_id ORDER BY {order_by} DESC LIMIT ?",
+            [*params, limit]
+        )
+        return [
+            {"id": item_id, "name": name, "quantity": quantity, "revenue": round(revenue, 2)}
+            for item_id, name, quantity, revenue in rows
+        ]
+
+
+order_analytics = OrderAnalytics(ANALYTICS_PATH, ANALYTICS_REFRESH_INTERVAL, ANALYTICS_PAGE_SIZE)
@@ -0,0 +1,71 @@
+from pydantic import AliasChoices, BaseModel, ConfigDict, EmailStr, Field
+from services.catalog import catalog
+
+
+class OrderItem(BaseModel):
+    # name/price from the client are only used while no catalog is configured
+    model_config = ConfigDict(extra="allow")
+
+    id: str = Field(min_length=1, max_length=64)
+    qty: int = Field(1, ge=1, le=100, validation_alias=AliasChoices("qty", "quantity"))
+
+
+class OrderAddress(BaseModel):
+    # Older clients send pincode as a number
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    country: str | None = None
+    state: str | None = None
+    city: str | None = None
+    street: str | None = None
+    pincode: str | None = None
+
+
+class OrderRequest(BaseModel):
+    # Older clients send phone as a number
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    email: EmailStr | None = None
+    name: str | None = None
+    phone: str | None = None
+    address: OrderAddress = OrderAddress()
+    paymentMethod: str = "COD"
+    items: list[OrderItem] = Field(min_length=1, max_length=100)
+    # Client-computed total; ignored when the catalog prices the order
+    total: float = 0
+
+
+def build_order_data(order: OrderRequest, user_id: str | None, email: str | None) -> dict:
+    """
+    The orders-table row for a validated request. Prices from the catalog
+    when it is enabled (raises UnknownProducts); callers check catalog.ready.
+    """
+    # ✅ Price from the catalog; never trust client totals
+    if catalog.enabled:
+        items, total = catalog.price([(item.id, item.qty) for item in order.items])
+    else:
+        items = [item.model_dump() for item in order.items]
+        total = order.total
+
+    address = order.address
+
+    return {
+        "email": email,
+        "isGuest": user_id is None,
+        "userId": user_id,
+        "name": order.name,
+        "country": address.country,
+        "state": address.state,
+        "city": address.city,
+        "street": address.street,
+        "pincode": address.pincode,
+        "phone": order.phone,
+        "paymentMethod": order.paymentMethod,
+
+        # 🔥 FIXED: store items as ARRAY (not string)
+        "items": items,
+
+        "total": total,
+
+        "status": "Pending"
+    }
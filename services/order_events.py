@@ -0,0 +1,236 @@
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+import orjson
+
+ORDER_EVENTS_QUEUE_SIZE = int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "32"))
+ORDER_EVENTS_HEARTBEAT = float(os.getenv("ORDER_EVENTS_HEARTBEAT", "15"))
+ORDER_EVENTS_MAX_SUBSCRIBERS = int(os.getenv("ORDER_EVENTS_MAX_SUBSCRIBERS", "2000"))
+ORDER_EVENTS_MAX_PER_USER = int(os.getenv("ORDER_EVENTS_MAX_PER_USER", "5"))
+# Client reconnect delay sent with the stream (ms)
+ORDER_EVENTS_RETRY_MS = int(os.getenv("ORDER_EVENTS_RETRY_MS", "3000"))
+# Event log shared by the workers on a host, and how often each reads it
+ORDER_EVENTS_PATH = os.getenv("ORDER_EVENTS_PATH", "order_events.sqlite3")
+ORDER_EVENTS_POLL = float(os.getenv("ORDER_EVENTS_POLL", "0.5"))
+ORDER_EVENTS_RETENTION = float(os.getenv("ORDER_EVENTS_RETENTION", "60"))
+
+_CLOSED = object()
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    """
+    One open event stream. Holds at most `maxsize` undelivered events;
+    when a slow client falls behind, the oldest are dropped.
+    """
+    __slots__ = ("user_id", "queue", "dropped")
+
+    def __init__(self, user_id: str, maxsize: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, item):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+
+class OrderEventHub:
+    """
+    Pub/sub of order events, keyed by user id.
+
+    publish() appends to a SQLite event log shared by the gunicorn workers
+    on a host and delivers to this worker's streams at once; every worker
+    polls the log every ORDER_EVENTS_POLL seconds for events published by
+    the others. The log id is the SSE event id. Workers on other hosts
+    don't share the file: run one host, or route status updates and
+    streams to the same host.
+    """
+
+    def __init__(self, path: str, queue_size: int, max_subscribers: int, max_per_user: int, poll: float):
+        self.path = path
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.max_per_user = max_per_user
+        self.poll = poll
+        self.origin = uuid.uuid4().hex
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._count = 0
+        self._db: sqlite3.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._last_id = 0
+        self._pruned_at = 0.0
+        self._closed = False
+
+    # ================= LIFECYCLE =================
+
+    async def start(self):
+        self._closed = False
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                origin TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                data BLOB NOT NULL,
+                at REAL NOT NULL
+            )
+            """
+        )
+        # Only events published from now on
+        self._last_id = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll)
+            try:
+                self._read_log()
+            except Exception as e:
+                print("ORDER EVENTS POLL ERROR:", e)
+
+    def _read_log(self):
+        rows = self._db.execute(
+            "SELECT id, origin, user_id, event, data FROM events WHERE id > ? ORDER BY id",
+            (self._last_id,)
+        ).fetchall()
+        for event_id, origin, user_id, event, data in rows:
+            self._last_id = event_id
+            # Our own events were delivered when published
+            if origin != self.origin:
+                self._deliver(user_id, (event_id, event, orjson.loads(data)))
+
+    # ================= SUBSCRIBE =================
+
+    def check_capacity(self, user_id: str):
+        """
+        Raise TooManySubscribers if `user_id` can't open another stream.
+        """
+        streams = self._subscribers.get(user_id, ())
+        if self._count >= self.max_subscribers or len(streams) >= self.max_per_user:
+            raise TooManySubscribers()
+
+    def subscribe(self, user_id: str) -> Subscription:
+        self.check_capacity(user_id)
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        streams = self._subscribers.get(subscription.user_id)
+        if streams and subscription in streams:
+            streams.discard(subscription)
+            self._count -= 1
+            if not streams:
+                del self._subscribers[subscription.user_id]
+
+    # ================= PUBLISH =================
+
+    def _deliver(self, user_id: str, message: tuple) -> int:
+        streams = self._subscribers.get(user_id)
+        if not streams:
+            return 0
+        for subscription in streams:
+            subscription.put(message)
+        return len(streams)
+
+    def publish(self, user_id: str | None, event: str, data: dict) -> int:
+        """
+        Record an event for every stream of `user_id`, in any worker.
+        Returns how many of this worker's streams got it.
+        """
+        if not user_id or self._db is None:
+            return 0
+
+        now = time.time()
+        event_id = self._db.execute(
+            "INSERT INTO events (origin, user_id, event, data, at) VALUES (?, ?, ?, ?, ?)",
+            (self.origin, user_id, event, orjson.dumps(data), now)
+        ).lastrowid
+        if now - self._pruned_at > ORDER_EVENTS_RETENTION:
+            self._pruned_at = now
+            self._db.execute("DELETE FROM events WHERE at < ?", (now - ORDER_EVENTS_RETENTION,))
+
+        return self._deliver(user_id, (event_id, event, data))
+
+    def close(self):
+        """
+        End every open stream (shutdown), so workers don't wait on idle clients.
+        Streams that start afterwards end at once.
+        """
+        self._closed = True
+        for streams in self._subscribers.values():
+            for subscription in streams:
+                subscription.put(_CLOSED)
+
+    def stats(self) -> dict:
+        return {"subscribers": self._count, "users": len(self._subscribers)}
+
+    # ================= STREAM =================
+
+    async def stream(self, user_id: str, heartbeat: float = ORDER_EVENTS_HEARTBEAT):
+        """
+        Server-Sent Events for one new subscription, with a comment line
+        every `heartbeat` seconds of silence to keep proxies from closing it.
+        The subscription lives inside the generator, so it is released
+        however the response ends, including before the first chunk.
+        """
+        if self._closed:
+            return
+
+        try:
+            subscription = self.subscribe(user_id)
+        except TooManySubscribers:
+            # Lost a race for the last slot after the route's capacity check
+            yield f"retry: {ORDER_EVENTS_RETRY_MS * 10}\n\n".encode()
+            return
+
+        try:
+            yield f"retry: {ORDER_EVENTS_RETRY_MS}\n\n".encode()
+            last_dropped = 0
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield f": ping {int(time.time())}\n\n".encode()
+                    continue
+                if item is _CLOSED:
+                    return
+
+                if subscription.dropped != last_dropped:
+                    # Tell the client it missed events and should re-read its orders
+                    last_dropped = subscription.dropped
+                    yield b"event: resync\ndata: {}\n\n"
+
+                event_id, event, data = item
+                yield b"id: %d\nevent: %s\ndata: %s\n\n" % (event_id, event.encode(), orjson.dumps(data))
+        finally:
+            self.unsubscribe(subscription)
+
+
+order_events = OrderEventHub(
+    ORDER_EVENTS_PATH, ORDER_EVENTS_QUEUE_SIZE, ORDER_EVENTS_MAX_SUBSCRIBERS, ORDER_EVENTS_MAX_PER_USER,
+    ORDER_EVENTS_POLL
+)
@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime, timezone
+import orjson
+from appwrite.query import Query
+from db.orders import orders as orders_repo
+from services.order_history import resolve_fields
+
+EXPORT_PAGE_SIZE = int(os.getenv("ORDER_EXPORT_PAGE_SIZE", "100"))
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _timestamp(value: datetime) -> str:
+    # Naive datetimes are taken as UTC, matching Appwrite's $createdAt
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def export_queries(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    statuses: list[str] | None = None
+) -> list[str]:
+    """
+    Filters for an export: created in [since, until), status in `statuses`.
+    """
+    queries = []
+    if since:
+        queries.append(Query.greater_than_equal("$createdAt", _timestamp(since)))
+    if until:
+        queries.append(Query.less_than("$createdAt", _timestamp(until)))
+    if statuses:
+        queries.append(Query.equal("status", statuses))
+
+    # Stable order so the cursor walks every row exactly once
+    queries.append(Query.order_asc("$createdAt"))
+    return queries
+
+
+def _csv_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"))
+    return "" if value is None else value
+
+
+async def stream_orders(queries: list[str], fields: tuple[str, ...], fmt: str):
+    """
+    Encoded NDJSON or CSV chunks, one per page of orders. Only one page is
+    held in memory, and the first chunk is sent as soon as the first page arrives.
+    """
+    attrs, columns = resolve_fields(fields)
+    queries = [*queries, Query.select(columns)]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(fields)
+        yield buffer.getvalue().encode()
+
+    try:
+        async for page in orders_repo.iter_pages(*queries, page_size=EXPORT_PAGE_SIZE):
+            if fmt != "csv":
+                yield b"".join(
+                    orjson.dumps({f: getattr(order, attr) for f, attr in attrs}) + b"\n"
+                    for order in page
+                )
+                continue
+
+            buffer.seek(0)
+            buffer.truncate()
+            for order in page:
+                writer.writerow([_csv_value(getattr(order, attr)) for _, attr in attrs])
+            yield buffer.getvalue().encode()
+
+    except Exception as e:
+        # Headers are already sent; abort so the client sees a truncated transfer
+        print("ORDER EXPORT ERROR:", e)
+        raise
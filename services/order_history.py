@@ -0,0 +1,90 @@
+import os
+from fastapi import HTTPException
+from appwrite.query import Query
+from db.mirror import read_mirror
+from db.orders import orders as orders_repo
+
+DEFAULT_PAGE_SIZE = int(os.getenv("ORDER_PAGE_SIZE", "25"))
+MAX_PAGE_SIZE = int(os.getenv("ORDER_MAX_PAGE_SIZE", "100"))
+
+ORDER_COLUMNS = (
+    "email", "isGuest", "userId", "name", "country", "state", "city",
+    "street", "pincode", "phone", "paymentMethod", "items", "total", "status",
+)
+
+# Public field name -> Order attribute. System attributes ($id, $createdAt, ...)
+# are always returned by Appwrite, so only plain columns go into Query.select.
+ORDER_FIELDS = {
+    "id": "id",
+    "$id": "id",
+    "createdAt": "createdAt",
+    "$createdAt": "createdAt",
+    "$updatedAt": "updatedAt",
+    **{column: column for column in ORDER_COLUMNS},
+}
+
+SUMMARY_FIELDS = ("id", "items", "total", "status")
+FULL_FIELDS = ("$id", "$createdAt", "$updatedAt", *ORDER_COLUMNS)
+
+
+def parse_fields(fields: str | None, default: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    Parse a `?fields=a,b,c` parameter, rejecting unknown names.
+    """
+    if not fields:
+        return default
+
+    requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in ORDER_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown order fields: {', '.join(unknown)}")
+
+    return requested or default
+
+
+def resolve_fields(fields: tuple[str, ...]) -> tuple[list[tuple[str, str]], list[str]]:
+    """
+    (public name, Order attribute) pairs for `fields`, plus the columns to Query.select.
+    """
+    attrs = [(f, ORDER_FIELDS[f]) for f in fields]
+    columns = sorted({attr for _, attr in attrs if attr in ORDER_COLUMNS})
+    return attrs, columns or ["$id"]
+
+
+async def get_order_history(
+    user_id: str,
+    fields: tuple[str, ...] = SUMMARY_FIELDS,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> dict:
+    """
+    One page of a user's orders, newest first, with only `fields` fetched.
+    Returns {"orders": [...], "nextCursor": str | None}.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    attrs, columns = resolve_fields(fields)
+
+    # One extra row tells us whether another page exists
+    rows = read_mirror.orders_for(user_id, cursor, limit + 1) if read_mirror.serves(user_id) else None
+
+    if rows is None:
+        queries = [
+            Query.equal("userId", user_id),
+            Query.order_desc("$createdAt"),
+            Query.select(columns),
+            Query.limit(limit + 1),
+        ]
+        if cursor:
+            queries.append(Query.cursor_after(cursor))
+        rows = await orders_repo.query(*queries)
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "orders": [
+            {f: getattr(order, attr) for f, attr in attrs}
+            for order in rows
+        ],
+        "nextCursor": rows[-1].id if has_more else None,
+    }
@@ -0,0 +1,409 @@
+import asyncio
+import codecs
+import csv
+import json
+import os
+import sqlite3
+import time
+import uuid
+from pydantic import ValidationError
+from db.orders import orders as orders_repo
+from db.resilience import is_transient
+from services.catalog import UnknownProducts
+from services.guest_orders import mark_unclaimed
+from services.order_data import OrderRequest, build_order_data
+from utils.metrics import ORDERS_IMPORTED_TOTAL, ORDER_IMPORT_RUNS_TOTAL
+
+ORDER_IMPORT_PATH = os.getenv("ORDER_IMPORT_PATH", "order_imports.sqlite3")
+ORDER_IMPORT_BATCH_SIZE = int(os.getenv("ORDER_IMPORT_BATCH_SIZE", "200"))
+ORDER_IMPORT_CONCURRENCY = int(os.getenv("ORDER_IMPORT_CONCURRENCY", "16"))
+ORDER_IMPORT_RETRIES = int(os.getenv("ORDER_IMPORT_RETRIES", "3"))
+ORDER_IMPORT_RETRY_BASE = float(os.getenv("ORDER_IMPORT_RETRY_BASE", "0.5"))
+# A running import's claim, renewed while it runs; a worker that died
+# mid-import blocks a resume for at most this long
+ORDER_IMPORT_LEASE = float(os.getenv("ORDER_IMPORT_LEASE", "60"))
+MAX_RECORD_BYTES = 64 * 1024
+
+# Row ids are derived from (import id, row number): re-running an import is idempotent
+IMPORT_NAMESPACE = uuid.UUID("0f6e8a3c-2b7d-4c19-8e45-9d1a7b3f6c20")
+
+ADDRESS_COLUMNS = ("country", "state", "city", "street", "pincode")
+IMPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Added after the first release; created on older progress files at start
+IMPORT_COLUMNS = {
+    "owner": "TEXT",
+    "lease_until": "REAL",
+}
+
+
+class ImportRejected(Exception):
+    """
+    The upload itself is unusable (bad header, oversized record); the
+    import stops and can be resumed with a fixed file.
+    """
+
+
+class ImportBusy(Exception):
+    """
+    Another run (in any worker) holds the import, or took it over mid-run.
+    """
+
+
+# ================= PARSING =================
+
+async def _records(chunks, fmt: str):
+    """
+    Complete records from the upload, decoded incrementally: NDJSON lines,
+    or CSV records (a quoted field may span lines). Blank lines are skipped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer, pending = "", ""
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        if len(buffer) > MAX_RECORD_BYTES:
+            raise ImportRejected(f"Record longer than {MAX_RECORD_BYTES} bytes")
+
+        for line in lines:
+            if fmt == "csv":
+                pending += line + "\n"
+                # Unbalanced quotes: the record continues on the next line
+                if pending.count('"') % 2:
+                    if len(pending) > MAX_RECORD_BYTES:
+                        raise ImportRejected(f"Record longer than {MAX_RECORD_BYTES} bytes")
+                    continue
+                line, pending = pending, ""
+            if line.strip():
+                yield line
+
+    buffer += decoder.decode(b"", final=True)
+    last = pending + buffer
+    if last.strip():
+        yield last
+
+
+def _order_fields(record: dict) -> dict:
+    """
+    Flat import columns -> the OrderRequest shape create_order accepts.
+    """
+    fields = {k: v for k, v in record.items() if k is not None and v not in ("", None)}
+    if "address" not in fields:
+        fields["address"] = {k: fields.pop(k) for k in ADDRESS_COLUMNS if k in fields}
+    if isinstance(fields.get("items"), str):
+        fields["items"] = json.loads(fields["items"])
+    return fields
+
+
+async def parse_rows(chunks, fmt: str):
+    """
+    Yield (row number, fields dict or error message) for every record.
+    """
+    header = None
+    row = 0
+    async for record in _records(chunks, fmt):
+        if fmt == "csv" and header is None:
+            header = [name.strip() for name in next(csv.reader([record]))]
+            if "items" not in header:
+                raise ImportRejected("CSV header must include an items column")
+            continue
+
+        row += 1
+        try:
+            if fmt == "csv":
+                values = next(csv.reader([record]))
+                if len(values) > len(header):
+                    raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+                data = dict(zip(header, values))
+            else:
+                data = json.loads(record)
+                if not isinstance(data, dict):
+                    raise ValueError("expected a JSON object")
+            yield row, _order_fields(data)
+        except ValueError as e:
+            yield row, f"Unreadable row: {e}"
+
+
+def _validate(fields) -> dict | str:
+    """
+    The orders-table row create_order would store for this record, or why not.
+    """
+    if isinstance(fields, str):
+        return fields
+    try:
+        order = OrderRequest.model_validate(fields)
+        return build_order_data(order, None, order.email)
+    except ValidationError as e:
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    except UnknownProducts as e:
+        return f"Unknown or unavailable products: {e}"
+
+
+# ================= IMPORTER =================
+
+class OrderImporter:
+    """
+    Admin bulk import of guest orders from a streamed CSV/NDJSON upload.
+
+    Records are parsed and validated as they arrive, in batches of
+    `batch_size`, so memory stays constant whatever the file size. Each
+    batch is written with up to `concurrency` parallel creates and then
+    committed to a local progress file together with its failures. A
+    re-upload under the same import id skips rows up to the last committed
+    batch; rows of an interrupted batch are written again, and the
+    deterministic row ids turn those into "existing" instead of duplicates.
+    Imported orders are guest orders, claimed at the customer's next login.
+
+    A run claims its import in the progress file, shared by the workers on
+    a host, with a lease it renews while running; a second upload of the
+    same import id gets ImportBusy until the run ends or its lease expires.
+    """
+
+    def __init__(self, path: str, batch_size: int, concurrency: int, lease: float):
+        self.path = path
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.lease = lease
+        self._db: sqlite3.Connection | None = None
+
+    # ================= LIFECYCLE =================
+
+    async def start(self):
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS imports (
+                import_id TEXT PRIMARY KEY,
+                format TEXT NOT NULL,
+                status TEXT NOT NULL,
+                checkpoint INTEGER NOT NULL DEFAULT 0,
+                imported INTEGER NOT NULL DEFAULT 0,
+                existing INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS import_failures (
+                import_id TEXT NOT NULL,
+                row INTEGER NOT NULL,
+                error TEXT NOT NULL,
+                PRIMARY KEY (import_id, row)
+            );
+            """
+        )
+        existing = {row[1] for row in self._db.execute("PRAGMA table_info(imports)")}
+        for name, kind in IMPORT_COLUMNS.items():
+            if name not in existing:
+                self._db.execute(f"ALTER TABLE imports ADD COLUMN {name} {kind}")
+
+    async def stop(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ================= PROGRESS =================
+
+    def _progress(self, import_id: str) -> dict | None:
+        cursor = self._db.execute(
+            "SELECT import_id, format, status, checkpoint, imported, existing, failed, error, started_at, updated_at"
+            " FROM imports WHERE import_id = ?",
+            (import_id,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return {
+            "importId": row[0], "format": row[1], "status": row[2], "rows": row[3],
+            "imported": row[4], "existing": row[5], "failed": row[6], "error": row[7],
+            "startedAt": row[8], "updatedAt": row[9],
+        }
+
+    def _claim(self, import_id: str, fmt: str, owner: str) -> int | None:
+        """
+        Take the import for `owner` unless another live run holds it.
+        Returns the committed checkpoint, or None if the import is busy.
+        """
+        now = time.time()
+        self._db.execute(
+            "INSERT INTO imports (import_id, format, status, started_at, updated_at) VALUES (?, ?, 'new', ?, ?)"
+            " ON CONFLICT (import_id) DO NOTHING",
+            (import_id, fmt, now, now)
+        )
+        row = self._db.execute(
+            """
+            UPDATE imports SET status = 'running', owner = ?, lease_until = ?, error = NULL, updated_at = ?
+            WHERE import_id = ? AND (status != 'running' OR lease_until IS NULL OR lease_until < ?)
+            RETURNING checkpoint
+            """,
+            (owner, now + self.lease, now, import_id, now)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def _renew(self, import_id: str, owner: str):
+        self._db.execute(
+            "UPDATE imports SET lease_until = ? WHERE import_id = ? AND owner = ?",
+            (time.time() + self.lease, import_id, owner)
+        )
+
+    async def _keep_lease(self, import_id: str, owner: str):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                self._renew(import_id, owner)
+            except sqlite3.Error as e:
+                print("ORDER IMPORT LEASE ERROR:", e)
+
+    def _set_status(self, import_id: str, owner: str, status: str, error: str | None = None):
+        self._db.execute(
+            "UPDATE imports SET status = ?, error = ?, lease_until = NULL, updated_at = ? WHERE import_id = ? AND owner = ?",
+            (status, error, time.time(), import_id, owner)
+        )
+
+    def _commit_batch(self, import_id: str, owner: str, expected: int, last_row: int, counts: dict,
+                      failures: list[tuple[int, str]]) -> bool:
+        """
+        Record a batch on top of checkpoint `expected`. False (nothing
+        recorded) if another run has taken the import over since.
+        """
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            updated = self._db.execute(
+                """
+                UPDATE imports SET checkpoint = ?, imported = imported + ?, existing = existing + ?,
+                    failed = failed + ?, updated_at = ?
+                WHERE import_id = ? AND owner = ? AND checkpoint = ?
+                """,
+                (last_row, counts["imported"], counts["existing"], len(failures), time.time(),
+                 import_id, owner, expected)
+            ).rowcount
+            if not updated:
+                self._db.execute("ROLLBACK")
+                return False
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO import_failures (import_id, row, error) VALUES (?, ?, ?)",
+                [(import_id, row, error) for row, error in failures]
+            )
+            self._db.execute("COMMIT")
+            return True
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    def report(self, import_id: str, offset: int = 0, limit: int = 100) -> dict | None:
+        """
+        Progress of an import plus a page of its failed rows.
+        """
+        progress = self._progress(import_id)
+        if progress is None:
+            return None
+        failures = self._db.execute(
+            "SELECT row, error FROM import_failures WHERE import_id = ? ORDER BY row LIMIT ? OFFSET ?",
+            (import_id, limit, offset)
+        )
+        return {**progress, "failures": [{"row": row, "error": error} for row, error in failures]}
+
+    # ================= IMPORT =================
+
+    async def _write(self, import_id: str, row: int, data: dict) -> str:
+        """
+        Create one order, retrying transient failures. Returns "imported" or "existing".
+        """
+        row_id = str(uuid.uuid5(IMPORT_NAMESPACE, f"{import_id}:{row}"))
+        for attempt in range(ORDER_IMPORT_RETRIES + 1):
+            try:
+                await orders_repo.create(row_id, data)
+                mark_unclaimed(data.get("email"))
+                return "imported"
+            except Exception as e:
+                if getattr(e, "code", None) == 409:
+                    return "existing"
+                if not is_transient(e) or attempt == ORDER_IMPORT_RETRIES:
+                    raise
+                await asyncio.sleep(ORDER_IMPORT_RETRY_BASE * 2 ** attempt)
+
+    async def _run_batch(self, import_id: str, owner: str, checkpoint: int, batch: list[tuple[int, dict | str]]) -> int:
+        """
+        Write and commit one batch on top of `checkpoint`; returns the new checkpoint.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        counts = {"imported": 0, "existing": 0}
+        failures, outages = [], []
+
+        async def write(row: int, data: dict):
+            async with semaphore:
+                try:
+                    counts[await self._write(import_id, row, data)] += 1
+                except Exception as e:
+                    if is_transient(e):
+                        outages.append(e)
+                    else:
+                        failures.append((row, f"Rejected by Appwrite: {e}"))
+
+        tasks = []
+        for row, data in batch:
+            if isinstance(data, str):
+                failures.append((row, data))
+            else:
+                tasks.append(write(row, data))
+        await asyncio.gather(*tasks)
+
+        if outages:
+            # Appwrite is down; leave the batch uncommitted so a resume redoes it
+            raise outages[0]
+        if not self._commit_batch(import_id, owner, checkpoint, batch[-1][0], counts, failures):
+            raise ImportBusy(import_id)
+        for outcome, n in counts.items():
+            ORDERS_IMPORTED_TOTAL.inc(outcome, amount=n)
+        ORDERS_IMPORTED_TOTAL.inc("failed", amount=len(failures))
+        return batch[-1][0]
+
+    async def run(self, import_id: str, fmt: str, chunks) -> dict:
+        """
+        Import (or resume) `import_id` from an async iterator of upload chunks.
+        Returns the final progress report.
+        """
+        owner = uuid.uuid4().hex
+        checkpoint = self._claim(import_id, fmt, owner)
+        if checkpoint is None:
+            raise ImportBusy(import_id)
+        # Failures past the checkpoint belong to a batch that never committed
+        self._db.execute("DELETE FROM import_failures WHERE import_id = ? AND row > ?", (import_id, checkpoint))
+
+        lease = asyncio.create_task(self._keep_lease(import_id, owner))
+        status = "done"
+        try:
+            batch = []
+            async for row, fields in parse_rows(chunks, fmt):
+                if row <= checkpoint:
+                    continue
+                batch.append((row, _validate(fields)))
+                if len(batch) >= self.batch_size:
+                    checkpoint = await self._run_batch(import_id, owner, checkpoint, batch)
+                    batch = []
+            if batch:
+                checkpoint = await self._run_batch(import_id, owner, checkpoint, batch)
+        except ImportBusy:
+            # Our lease lapsed and another run owns the import now; leave its status alone
+            ORDER_IMPORT_RUNS_TOTAL.inc("superseded")
+            raise
+        except ImportRejected as e:
+            status = "rejected"
+            self._set_status(import_id, owner, status, str(e))
+        except Exception as e:
+            # Upload cut off or Appwrite down; the reason is in the import's report
+            status = "interrupted"
+            self._set_status(import_id, owner, status, repr(e) if not str(e) else str(e))
+        else:
+            self._set_status(import_id, owner, status)
+        finally:
+            lease.cancel()
+        ORDER_IMPORT_RUNS_TOTAL.inc(status)
+
+        return self.report(import_id)
+
+
+order_importer = OrderImporter(ORDER_IMPORT_PATH, ORDER_IMPORT_BATCH_SIZE, ORDER_IMPORT_CONCURRENCY, ORDER_IMPORT_LEASE)
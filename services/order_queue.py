@@ -0,0 +1,271 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from appwrite.exception import AppwriteException
+from db.orders import orders as orders_repo
+from services.guest_orders import GUEST_CLAIMS_SCHEMA, NOTE_GUEST_WRITE
+from utils.metrics import ORDER_WRITES_FAILED_TOTAL
+
+ORDER_SPOOL_PATH = os.getenv("ORDER_SPOOL_PATH", "order_spool.sqlite3")
+ORDER_WRITE_WORKERS = int(os.getenv("ORDER_WRITE_WORKERS", "4"))
+ORDER_RETRY_BASE = float(os.getenv("ORDER_RETRY_BASE", "0.5"))
+ORDER_RETRY_MAX = float(os.getenv("ORDER_RETRY_MAX", "60"))
+# Seconds a stopping worker waits for spooled orders to reach Appwrite
+ORDER_DRAIN_TIMEOUT = float(os.getenv("ORDER_DRAIN_TIMEOUT", "10"))
+# Seconds a worker owns a spooled row it is writing; other workers leave it alone until then
+ORDER_SPOOL_LEASE = float(os.getenv("ORDER_SPOOL_LEASE", "30"))
+# Written orders stay in the spool this long so Idempotency-Key retries get the stored order back
+ORDER_IDEMPOTENCY_TTL = float(os.getenv("ORDER_IDEMPOTENCY_TTL", str(24 * 3600)))
+
+# Columns added after the first spool release; ALTERed into older files on start
+SPOOL_COLUMNS = {
+    "fingerprint": "TEXT",
+    "claimed_by": "TEXT",
+    "lease_until": "REAL",
+    "written_at": "REAL",
+}
+
+
+def _is_permanent(e: Exception) -> bool:
+    """
+    4xx answers (other than timeouts / throttling) will never succeed on retry.
+    """
+    code = getattr(e, "code", 0) or 0
+    return isinstance(e, AppwriteException) and 400 <= code < 500 and code not in (408, 429)
+
+
+class OrderWriteQueue:
+    """
+    In-process write-behind queue for new orders.
+
+    Every order is first appended to a local SQLite spool, then written to
+    Appwrite by background workers with exponential backoff. Pending orders
+    are replayed on the next start. Row ids are caller-supplied, which makes
+    both the spool insert and the Appwrite create idempotent; written rows
+    are kept for `idempotency_ttl` so a repeated key finds the stored order.
+
+    Gunicorn workers on a host share the spool file. A worker writes a row
+    only while holding its lease (`claimed_by` / `lease_until`), so rows
+    replayed by several workers at start are written by one of them; a
+    row whose owner died is taken over once the lease runs out.
+    """
+
+    def __init__(self, path: str, workers: int, lease: float = ORDER_SPOOL_LEASE, idempotency_ttl: float = ORDER_IDEMPOTENCY_TTL):
+        self.path = path
+        self.workers = workers
+        self.lease = lease
+        self.idempotency_ttl = idempotency_ttl
+        self.owner = uuid.uuid4().hex
+        self._pruned_at = 0.0
+        self._db: sqlite3.Connection | None = None
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._retry_handles: set[asyncio.TimerHandle] = set()
+
+    # ================= LIFECYCLE =================
+
+    async def start(self):
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS spool (
+                row_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                error TEXT,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        existing = {row[1] for row in self._db.execute("PRAGMA table_info(spool)")}
+        for name, kind in SPOOL_COLUMNS.items():
+            if name not in existing:
+                self._db.execute(f"ALTER TABLE spool ADD COLUMN {name} {kind}")
+        self._db.execute(GUEST_CLAIMS_SCHEMA)
+        self._prune()
+
+        self._queue = asyncio.Queue()
+        # Every pending row is queued; the lease decides which worker writes it
+        pending = self._db.execute(
+            "SELECT row_id FROM spool WHERE status = 'pending' ORDER BY created_at"
+        ).fetchall()
+        for (row_id,) in pending:
+            self._queue.put_nowait(row_id)
+        if pending:
+            print(f"ORDER SPOOL: replaying {len(pending)} pending orders")
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 10):
+        """
+        Give in-flight writes up to `drain_timeout` seconds, then stop.
+        Anything left stays in the spool for the next start.
+        """
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"ORDER SPOOL: {self.pending_count()} orders left for replay")
+
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ================= SUBMIT =================
+
+    def submit(self, row_id: str, data: dict, fingerprint: str | None = None) -> bool:
+        """
+        Durably accept an order. Returns False if `row_id` was already
+        spooled; lookup() then has the stored order.
+        """
+        now = time.time()
+        cursor = self._db.execute(
+            """
+            INSERT OR IGNORE INTO spool (row_id, data, created_at, fingerprint, claimed_by, lease_until)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (row_id, json.dumps(data), now, fingerprint, self.owner, now + self.lease)
+        )
+        if cursor.rowcount == 0:
+            return False
+
+        self._queue.put_nowait(row_id)
+        return True
+
+    def lookup(self, row_id: str) -> tuple[dict, str | None] | None:
+        """
+        (order data, request fingerprint) of a spooled or recently written order.
+        """
+        row = self._db.execute("SELECT data, fingerprint FROM spool WHERE row_id = ?", (row_id,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _prune(self):
+        now = time.time()
+        if now - self._pruned_at < 60:
+            return
+        self._pruned_at = now
+        self._db.execute(
+            "DELETE FROM spool WHERE status = 'written' AND written_at < ?",
+            (now - self.idempotency_ttl,)
+        )
+
+    def pending_count(self) -> int:
+        if self._db is None:
+            return 0
+        return self._db.execute("SELECT COUNT(*) FROM spool WHERE status = 'pending'").fetchone()[0]
+
+    # ================= WORKERS =================
+
+    def _retry_later(self, row_id: str, delay: float):
+        loop = asyncio.get_running_loop()
+
+        def requeue():
+            self._retry_handles.discard(handle)
+            self._queue.put_nowait(row_id)
+
+        handle = loop.call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    def _claim(self, row_id: str) -> str | None:
+        """
+        Take (or renew) the lease on a pending row. Returns its data, or
+        None if it is done or leased to another worker (then re-checked
+        when that lease runs out).
+        """
+        now = time.time()
+        row = self._db.execute(
+            """
+            UPDATE spool SET claimed_by = ?, lease_until = ?
+            WHERE row_id = ? AND status = 'pending'
+                AND (claimed_by IS NULL OR claimed_by = ? OR lease_until IS NULL OR lease_until < ?)
+            RETURNING data
+            """,
+            (self.owner, now + self.lease, row_id, self.owner, now)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+
+        held = self._db.execute(
+            "SELECT lease_until FROM spool WHERE row_id = ? AND status = 'pending'", (row_id,)
+        ).fetchone()
+        if held is not None:
+            self._retry_later(row_id, max(0.0, (held[0] or now) - now) + 1)
+        return None
+
+    async def _write(self, row_id: str):
+        raw = self._claim(row_id)
+        if raw is None:
+            return
+
+        data = json.loads(raw)
+        try:
+            await orders_repo.create(row_id=row_id, data=data)
+        except AppwriteException as e:
+            # Already written by an earlier attempt / replay
+            if e.code != 409:
+                raise
+
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute(
+                "UPDATE spool SET status = 'written', written_at = ?, claimed_by = NULL WHERE row_id = ?",
+                (now, row_id)
+            )
+            # The next login for this email, on any worker, claims it
+            if data.get("isGuest") and data.get("email"):
+                self._db.execute(NOTE_GUEST_WRITE, (data["email"], now))
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        self._prune()
+
+    async def _worker(self):
+        while True:
+            row_id = await self._queue.get()
+            try:
+                await self._write(row_id)
+            except Exception as e:
+                if _is_permanent(e):
+                    print("ORDER WRITE FAILED:", row_id, e)
+                    ORDER_WRITES_FAILED_TOTAL.inc()
+                    self._db.execute(
+                        "UPDATE spool SET status = 'failed', error = ?, claimed_by = NULL WHERE row_id = ?",
+                        (str(e), row_id)
+                    )
+                else:
+                    attempts = self._db.execute(
+                        "UPDATE spool SET attempts = attempts + 1, error = ? WHERE row_id = ? RETURNING attempts",
+                        (str(e), row_id)
+                    ).fetchone()[0]
+                    delay = min(ORDER_RETRY_MAX, ORDER_RETRY_BASE * 2 ** (attempts - 1))
+                    # Keep the lease through the backoff so no other worker takes the row
+                    self._db.execute(
+                        "UPDATE spool SET lease_until = ? WHERE row_id = ? AND claimed_by = ?",
+                        (time.time() + delay + self.lease, row_id, self.owner)
+                    )
+                    print(f"ORDER WRITE RETRY {attempts}:", row_id, e)
+                    self._retry_later(row_id, delay)
+            finally:
+                self._queue.task_done()
+
+
+order_queue = OrderWriteQueue(ORDER_SPOOL_PATH, ORDER_WRITE_WORKERS)
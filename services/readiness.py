@@ -0,0 +1,138 @@
+import asyncio
+import os
+import signal
+import threading
+import time
+from appwrite.query import Query
+from db.users import users as users_repo
+from services.catalog import catalog
+
+READY_CHECK_TIMEOUT = float(os.getenv("READY_CHECK_TIMEOUT", "2"))
+# Probes hit /ready every few seconds per worker; reuse a recent answer
+READY_CHECK_TTL = float(os.getenv("READY_CHECK_TTL", "5"))
+# Seconds between SIGTERM (/ready turns 503) and the server closing its
+# listeners, so load balancers stop routing here first. 0 for local runs
+SHUTDOWN_DRAIN_DELAY = float(os.getenv("SHUTDOWN_DRAIN_DELAY", "0"))
+
+
+class Readiness:
+    """
+    Whether this worker should receive traffic: startup finished, not
+    draining for shutdown, product catalog loaded (if configured), and
+    Appwrite answering a one-row read.
+    """
+
+    def __init__(self, drain_delay: float = SHUTDOWN_DRAIN_DELAY):
+        self.accepting = False
+        self.draining = False
+        self.drain_delay = drain_delay
+        self._checked_at = 0.0
+        self._error: str | None = "not checked"
+        self._lock = asyncio.Lock()
+        self._on_drain: list = []
+        self._previous: dict = {}
+
+    # ================= LIFECYCLE =================
+
+    def start(self):
+        """
+        Startup finished: report ready and watch for shutdown signals.
+        """
+        self.accepting = True
+        self.draining = False
+        self.install_signal_handlers()
+
+    def stop(self):
+        self.drain()
+        self.restore_signal_handlers()
+
+    def on_drain(self, callback):
+        """
+        Run `callback()` when shutdown starts (e.g. end open event streams).
+        """
+        self._on_drain.append(callback)
+
+    def drain(self):
+        """
+        Stop reporting ready and run the drain callbacks. Idempotent.
+        """
+        self.accepting = False
+        if self.draining:
+            return
+        self.draining = True
+        for callback in self._on_drain:
+            try:
+                callback()
+            except Exception as e:
+                print("DRAIN CALLBACK ERROR:", e)
+
+    def install_signal_handlers(self):
+        """
+        Drain as soon as SIGTERM/SIGINT arrives, then pass the signal on to
+        the server's own handler (after `drain_delay` for SIGTERM).
+
+        Uvicorn only runs lifespan shutdown once every connection has
+        closed; without this, an open event stream keeps /ready at 200 and
+        the worker waiting until it is killed.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        loop = asyncio.get_running_loop()
+
+        def handler(sig, frame):
+            first = not self.draining
+            loop.call_soon_threadsafe(self.drain)
+            delay = self.drain_delay if first and sig == signal.SIGTERM else 0
+            loop.call_soon_threadsafe(loop.call_later, delay, self._forward, sig, frame)
+
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            self._previous[sig] = signal.signal(sig, handler)
+
+    def restore_signal_handlers(self):
+        for sig, previous in self._previous.items():
+            signal.signal(sig, previous)
+        self._previous.clear()
+
+    def _forward(self, sig, frame):
+        previous = self._previous.get(sig)
+        if callable(previous):
+            previous(sig, frame)
+        else:
+            # Default action (no server handler): restore it and re-raise
+            self.restore_signal_handlers()
+            signal.raise_signal(sig)
+
+    async def _check_appwrite(self):
+        try:
+            await asyncio.wait_for(
+                users_repo.db.list_rows(
+                    database_id=users_repo.database_id,
+                    table_id=users_repo.table_id,
+                    queries=[Query.select(["$id"]), Query.limit(1)]
+                ),
+                timeout=READY_CHECK_TIMEOUT
+            )
+            self._error = None
+        except Exception as e:
+            print("READY CHECK ERROR:", repr(e))
+            self._error = repr(e) if not str(e) else str(e)
+        self._checked_at = time.monotonic()
+
+    # ================= STATUS =================
+
+    async def status(self) -> tuple[bool, dict]:
+        if not self.accepting:
+            return False, {"status": "starting or draining"}
+        if catalog.enabled and not catalog.ready:
+            return False, {"status": "catalog not loaded"}
+
+        async with self._lock:
+            if time.monotonic() - self._checked_at > READY_CHECK_TTL:
+                await self._check_appwrite()
+
+        if self._error:
+            return False, {"status": "appwrite unreachable", "error": self._error}
+        return True, {"status": "ready"}
+
+
+readiness = Readiness()
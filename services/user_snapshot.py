@@ -0,0 +1,75 @@
+import asyncio
+import os
+from db.mirror import read_mirror
+from db.records import User
+from db.users import users as users_repo
+from services.order_history import get_order_history, DEFAULT_PAGE_SIZE, SUMMARY_FIELDS
+
+USER_FETCH_TIMEOUT = float(os.getenv("SNAPSHOT_USER_TIMEOUT", "5"))
+ORDERS_FETCH_TIMEOUT = float(os.getenv("SNAPSHOT_ORDERS_TIMEOUT", "3"))
+
+EMPTY_HISTORY = {"orders": [], "nextCursor": None}
+
+
+class UserSnapshot:
+    """
+    A user plus one page of their orders. `partial` is set when the orders
+    read failed or timed out and `history` is empty as a result.
+    """
+    __slots__ = ("user", "history", "partial")
+
+    def __init__(self, user: User, history: dict, partial: bool):
+        self.user = user
+        self.history = history
+        self.partial = partial
+
+
+async def _fetch_user(user_id: str) -> User | None:
+    # Users created since the last mirror sync are not in it yet
+    user = read_mirror.user(user_id) if read_mirror.serves(user_id) else None
+    return user or await users_repo.get(user_id)
+
+
+async def _fetch_history(user_id: str, fields, cursor, limit) -> tuple[dict, bool]:
+    try:
+        history = await asyncio.wait_for(
+            get_order_history(user_id, fields, cursor, limit),
+            timeout=ORDERS_FETCH_TIMEOUT
+        )
+        return history, False
+    except Exception as e:
+        print("SNAPSHOT ORDERS ERROR:", repr(e))
+        return EMPTY_HISTORY, True
+
+
+async def get_user_snapshot(
+    user_id: str,
+    fields: tuple[str, ...] = SUMMARY_FIELDS,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> UserSnapshot | None:
+    """
+    Read the user row and their orders concurrently, so latency is
+    max(user, orders) rather than the sum. Returns None if the user doesn't exist.
+    """
+    user, (history, partial) = await asyncio.gather(
+        asyncio.wait_for(_fetch_user(user_id), timeout=USER_FETCH_TIMEOUT),
+        _fetch_history(user_id, fields, cursor, limit)
+    )
+    if user is None:
+        return None
+
+    return UserSnapshot(user, history, partial)
+
+
+async def get_snapshot_for(
+    user: User,
+    fields: tuple[str, ...] = SUMMARY_FIELDS,
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> UserSnapshot:
+    """
+    Snapshot for a user row that was already looked up (e.g. by email).
+    """
+    history, partial = await _fetch_history(user.id, fields, cursor, limit)
+    return UserSnapshot(user, history, partial)
@@ -0,0 +1,41 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+@dataclass(frozen=True)
+class Settings:
+    appwrite_endpoint: str | None
+    appwrite_project_id: str | None
+    appwrite_api_key: str | None
+    appwrite_max_connections: int
+    appwrite_max_keepalive: int
+    appwrite_timeout: float
+    database_id: str | None
+    users_table_id: str | None
+    orders_table_id: str | None
+    email_index_table_id: str | None
+    products_table_id: str | None
+    sessions_table_id: str | None
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Deployment config, read from the environment on first use rather than
+    at import, so the app imports without credentials.
+    """
+    return Settings(
+        appwrite_endpoint=os.getenv("APPWRITE_ENDPOINT"),
+        appwrite_project_id=os.getenv("APPWRITE_PROJECT_ID"),
+        appwrite_api_key=os.getenv("APPWRITE_API_KEY"),
+        appwrite_max_connections=int(os.getenv("APPWRITE_MAX_CONNECTIONS", "100")),
+        appwrite_max_keepalive=int(os.getenv("APPWRITE_MAX_KEEPALIVE", "20")),
+        appwrite_timeout=float(os.getenv("APPWRITE_TIMEOUT", "10")),
+        database_id=os.getenv("DATABASE_ID"),
+        users_table_id=os.getenv("USERS_COLLECTION_ID"),
+        orders_table_id=os.getenv("ORDERS_COLLECTION_ID"),
+        email_index_table_id=os.getenv("EMAIL_INDEX_COLLECTION_ID"),
+        products_table_id=os.getenv("PRODUCTS_COLLECTION_ID"),
+        sessions_table_id=os.getenv("SESSIONS_COLLECTION_ID"),
+    )
@@ -0,0 +1,255 @@
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+# --------------------------
+# Metric Types
+# --------------------------
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_registry: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        _registry.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        for values, value in self._values.items():
+            yield self.name, _format_labels(self.labels, values), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value: float):
+        self._values[label_values] = value
+
+
+class CallbackGauge(Gauge):
+    """
+    Gauge whose values are read from `fn()` at scrape time.
+    `fn` returns {label_values_tuple: value}.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], fn):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def samples(self):
+        self._values = dict(self.fn())
+        yield from super().samples()
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [bucket counts..., sum, count]
+        self._values: dict[tuple, list] = {}
+        _registry.append(self)
+
+    def observe(self, *label_values, value: float):
+        series = self._values.get(label_values)
+        if series is None:
+            series = self._values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self):
+        for values, series in self._values.items():
+            for i, bound in enumerate(self.buckets):
+                yield f"{self.name}_bucket", _format_labels(self.labels, values, f'le="{bound}"'), series[i]
+            yield f"{self.name}_bucket", _format_labels(self.labels, values, 'le="+Inf"'), series[-1]
+            yield f"{self.name}_sum", _format_labels(self.labels, values), series[-2]
+            yield f"{self.name}_count", _format_labels(self.labels, values), series[-1]
+
+
+def render() -> str:
+    """
+    All registered metrics in Prometheus text exposition format.
+    """
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{labels} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# --------------------------
+# Application Metrics
+# --------------------------
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+HTTP_REQUESTS_TOTAL = Counter(
+    "http_requests_total", "HTTP responses by route and status", ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being served"
+)
+APPWRITE_CALL_SECONDS = Histogram(
+    "appwrite_call_duration_seconds", "Appwrite TablesDB call latency", ("table", "operation")
+)
+APPWRITE_CALL_ERRORS = Counter(
+    "appwrite_call_errors_total", "Failed Appwrite TablesDB calls", ("table", "operation")
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time including executor wait", ("operation",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Hashing calls rejected because the executor was saturated"
+)
+RATE_LIMITED_TOTAL = Counter(
+    "rate_limited_total", "Requests rejected with 429 by path and bucket key (ip, email)", ("path", "key")
+)
+APPWRITE_RETRIES_TOTAL = Counter(
+    "appwrite_retries_total", "Appwrite reads retried within the retry budget", ("table", "operation")
+)
+APPWRITE_SHORT_CIRCUITED_TOTAL = Counter(
+    "appwrite_short_circuited_total", "Appwrite calls skipped because the table's breaker was open", ("table", "operation")
+)
+APPWRITE_STALE_READS_TOTAL = Counter(
+    "appwrite_stale_reads_total", "Reads answered with the last good result instead of Appwrite", ("table",)
+)
+ORDERS_IMPORTED_TOTAL = Counter(
+    "orders_imported_total", "Bulk-imported order rows by outcome (imported, existing, failed)", ("outcome",)
+)
+ORDER_WRITES_FAILED_TOTAL = Counter(
+    "order_writes_failed_total", "Spooled orders Appwrite rejected permanently (kept in the spool as failed)"
+)
+ORDER_IMPORT_RUNS_TOTAL = Counter(
+    "order_import_runs_total", "Bulk import runs by final status (done, interrupted, rejected, superseded)", ("status",)
+)
+RESPONSE_CACHE_TOTAL = Counter(
+    "response_cache_total", "Cached user responses by outcome (hit, miss, not_modified)", ("outcome",)
+)
+
+
+# --------------------------
+# Server-Timing
+# --------------------------
+_server_timings: ContextVar[list | None] = ContextVar("server_timings", default=None)
+
+
+def record_timing(name: str, seconds: float):
+    """
+    Add a backend timing to the current request's Server-Timing header.
+    No-op outside a request (e.g. background tasks).
+    """
+    timings = _server_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+def timed_appwrite_call(operation: str):
+    """
+    Decorator for data-client methods taking `table_id`; records latency by table/operation.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(self, *args, **kwargs):
+            table = kwargs.get("table_id") or (args[1] if len(args) > 1 else "unknown")
+            start = time.perf_counter()
+            try:
+                return await fn(self, *args, **kwargs)
+            except Exception:
+                APPWRITE_CALL_ERRORS.inc(table, operation)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                APPWRITE_CALL_SECONDS.observe(table, operation, value=elapsed)
+                record_timing(f"appwrite.{operation}", elapsed)
+        return wrapper
+    return decorator
+
+
+def _server_timing_header(timings: list, total: float) -> bytes:
+    # Collapse repeated calls into one entry per name, summing durations
+    merged: dict[str, float] = {}
+    for name, seconds in timings:
+        merged[name] = merged.get(name, 0) + seconds
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in merged.items()]
+    entries.append(f"app;dur={total * 1000:.1f}")
+    return ", ".join(entries).encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status codes and in-flight
+    requests, and attaching a Server-Timing header to every response.
+    Latency ends when the last body chunk is sent, so BackgroundTasks that
+    run after the response don't count towards it.
+    """
+
+    def __init__(self, app, skip_paths: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings: list = []
+        token = _server_timings.set(timings)
+        status = 500
+        elapsed = None
+        HTTP_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing_header(timings, time.perf_counter() - start)))
+                message = {**message, "headers": headers}
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                elapsed = time.perf_counter() - start
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _server_timings.reset(token)
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            if elapsed is None:
+                elapsed = time.perf_counter() - start
+            HTTP_REQUEST_SECONDS.observe(scope["method"], route_path, value=elapsed)
+            HTTP_REQUESTS_TOTAL.inc(scope["method"], route_path, str(status))
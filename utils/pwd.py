@@ -1,13 +1,45 @@
-from passlib.context import CryptContext
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from fastapi import HTTPException
+from utils.metrics import PASSWORD_HASH_SECONDS, PASSWORD_HASH_REJECTED, record_timing
 
-# Create context with bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# --------------------------
+# Hashing Configuration
+# --------------------------
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Per web worker: with WEB_CONCURRENCY workers each gets its share of the
+# cores, so the host runs about one bcrypt process per core in total
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY))))
+HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(HASH_WORKERS * 4)))
+HASH_RETRY_AFTER = os.getenv("PASSWORD_HASH_RETRY_AFTER", "2")
+
+@lru_cache
+def get_pwd_context():
+    """
+    bcrypt context; hashes below the configured cost are flagged by needs_update.
+    Built on first use: hashing runs in pool workers, so the web process
+    doesn't need passlib loaded at startup.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+    )
 
 def hash_password(password: str) -> str:
     """
     Generate a secure bcrypt hash of the password.
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -16,8 +48,76 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     try:
         # standard bcrypt check
-        return pwd_context.verify(plain_password, hashed_password)
+        return get_pwd_context().verify(plain_password, hashed_password)
     except ValueError:
         # Fallback to plain text check for legacy un-hashed passwords
         # IMPORTANT: This should be removed after migration
         return plain_password == hashed_password
+
+def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verify a password and return a replacement hash when the stored one
+    is outdated (lower cost factor or legacy plain text), else None.
+    """
+    try:
+        return get_pwd_context().verify_and_update(plain_password, hashed_password)
+    except ValueError:
+        if plain_password == hashed_password:
+            return True, get_pwd_context().hash(plain_password)
+        return False, None
+
+# --------------------------
+# Hashing Executor
+# --------------------------
+_executor: ProcessPoolExecutor | None = None
+_pending = 0
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+async def _run_in_executor(operation: str, fn, *args):
+    """
+    Run a hashing function on the process pool.
+    Rejects with 503 instead of queueing once HASH_MAX_PENDING calls are in flight.
+    """
+    global _pending
+    if _pending >= HASH_MAX_PENDING:
+        PASSWORD_HASH_REJECTED.inc()
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, please retry",
+            headers={"Retry-After": HASH_RETRY_AFTER},
+        )
+
+    _pending += 1
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died; start a fresh pool for the next call
+        shutdown_executor()
+        raise
+    finally:
+        _pending -= 1
+        elapsed = time.perf_counter() - start
+        PASSWORD_HASH_SECONDS.observe(operation, value=elapsed)
+        record_timing("bcrypt", elapsed)
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_executor("hash", hash_password, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await _run_in_executor("verify", verify_and_update, plain_password, hashed_password)
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
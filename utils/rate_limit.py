@@ -0,0 +1,257 @@
+import json
+import math
+import os
+import sqlite3
+import time
+from utils.cache import TTLCache
+from utils.metrics import RATE_LIMITED_TOTAL
+
+# --------------------------
+# Rate Limit Configuration
+# --------------------------
+# "<requests>/<seconds>": bucket size and the window it refills over
+LOGIN_LIMIT_IP = os.getenv("LOGIN_RATE_LIMIT_IP", "20/60")
+LOGIN_LIMIT_EMAIL = os.getenv("LOGIN_RATE_LIMIT_EMAIL", "5/60")
+REGISTER_LIMIT_IP = os.getenv("REGISTER_RATE_LIMIT_IP", "5/300")
+REGISTER_LIMIT_EMAIL = os.getenv("REGISTER_RATE_LIMIT_EMAIL", "3/300")
+
+# memory: per process. sqlite: shared by all workers on the host through RATE_LIMIT_PATH
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory")
+RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", "rate_limit.sqlite3")
+# Only enable behind a proxy that sets X-Forwarded-For, or clients can pick their own key
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() == "true"
+
+MAX_BODY_BYTES = 64 * 1024
+
+
+class Limit:
+    __slots__ = ("capacity", "window", "rate")
+
+    def __init__(self, capacity: int, window: float):
+        self.capacity = capacity
+        self.window = window
+        self.rate = capacity / window
+
+    @classmethod
+    def parse(cls, spec: str) -> "Limit":
+        capacity, window = spec.split("/")
+        return cls(int(capacity), float(window))
+
+    def policy(self) -> str:
+        return f"{self.capacity};w={self.window:g}"
+
+
+def _refill(tokens: float, updated: float, limit: Limit, now: float) -> float:
+    return min(limit.capacity, tokens + (now - updated) * limit.rate)
+
+
+# --------------------------
+# Bucket Stores
+# --------------------------
+class MemoryBucketStore:
+    """
+    Token buckets in process memory. Idle buckets expire once they would be full again.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.buckets = TTLCache(maxsize=maxsize, ttl=3600)
+
+    def take(self, key: str, limit: Limit, now: float) -> tuple[bool, float]:
+        """
+        Spend one token if there is one. Returns (allowed, tokens left).
+        """
+        tokens, updated = self.buckets.get(key, (limit.capacity, now))
+        tokens = _refill(tokens, updated, limit, now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        self.buckets.set(key, (tokens, now), ttl=limit.window)
+        return allowed, tokens
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a local SQLite file so every worker on the host shares them.
+    Each take() is one short IMMEDIATE transaction.
+    """
+
+    def __init__(self, path: str):
+        self._takes = 0
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=1)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+            """
+        )
+
+    def take(self, key: str, limit: Limit, now: float) -> tuple[bool, float]:
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._db.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(*row, limit, now) if row else limit.capacity
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now)
+            )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+        # Buckets idle for an hour are full again; drop them now and then
+        self._takes += 1
+        if self._takes % 1000 == 0:
+            self._db.execute("DELETE FROM buckets WHERE updated < ?", (now - 3600,))
+
+        return allowed, tokens
+
+
+def create_store():
+    if RATE_LIMIT_STORE == "sqlite":
+        return SQLiteBucketStore(RATE_LIMIT_PATH)
+    return MemoryBucketStore()
+
+
+# --------------------------
+# Middleware
+# --------------------------
+DEFAULT_RULES = {
+    ("POST", "/auth/login"): (("ip", Limit.parse(LOGIN_LIMIT_IP)), ("email", Limit.parse(LOGIN_LIMIT_EMAIL))),
+    ("POST", "/auth/register"): (("ip", Limit.parse(REGISTER_LIMIT_IP)), ("email", Limit.parse(REGISTER_LIMIT_EMAIL))),
+}
+
+
+def _client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _email(body: bytes) -> str | None:
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying token buckets per client IP and per email to
+    the auth endpoints. Runs before routing, so a rejected request costs
+    no bcrypt work and no Appwrite calls. Every limited response carries
+    RateLimit-Limit / -Remaining / -Reset / -Policy for the tightest bucket,
+    and a 429 also carries Retry-After.
+    """
+
+    def __init__(self, app, rules: dict | None = None, store=None):
+        self.app = app
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.store = store or create_store()
+
+    async def _read_body(self, receive) -> tuple[bytes, list]:
+        messages, body = [], b""
+        while True:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body") or len(body) > MAX_BODY_BYTES:
+                break
+        return body, messages
+
+    def _check(self, rules, keys: dict) -> tuple[bool, list]:
+        now = time.time()
+        verdicts = []
+        for kind, limit in rules:
+            value = keys.get(kind)
+            if not value:
+                continue
+            try:
+                allowed, tokens = self.store.take(f"{kind}:{value}", limit, now)
+            except sqlite3.Error as e:
+                # Never lock users out because the shared store is busy
+                print("RATE LIMIT STORE ERROR:", e)
+                continue
+            verdicts.append((kind, limit, allowed, tokens))
+
+        return all(allowed for _, _, allowed, _ in verdicts), verdicts
+
+    @staticmethod
+    def _headers(verdicts: list) -> list[tuple[bytes, bytes]]:
+        # Report the bucket closest to running out, rejected ones first
+        kind, limit, allowed, tokens = min(verdicts, key=lambda v: (v[2], v[3]))
+        headers = [
+            (b"ratelimit-limit", str(limit.capacity).encode()),
+            (b"ratelimit-remaining", str(math.floor(tokens)).encode()),
+            (b"ratelimit-reset", str(math.ceil((limit.capacity - tokens) / limit.rate)).encode()),
+            (b"ratelimit-policy", limit.policy().encode()),
+        ]
+        if not allowed:
+            headers.append((b"retry-after", str(math.ceil((1 - tokens) / limit.rate)).encode()))
+        return headers
+
+    async def __call__(self, scope, receive, send):
+        rules = self.rules.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if not rules:
+            await self.app(scope, receive, send)
+            return
+
+        keys = {"ip": _client_ip(scope)}
+        if any(kind == "email" for kind, _ in rules):
+            body, messages = await self._read_body(receive)
+            keys["email"] = _email(body)
+
+            async def replay():
+                if messages:
+                    return messages.pop(0)
+                return await receive()
+            app_receive = replay
+        else:
+            app_receive = receive
+
+        allowed, verdicts = self._check(rules, keys)
+        if not verdicts:
+            await self.app(scope, app_receive, send)
+            return
+
+        headers = self._headers(verdicts)
+
+        if not allowed:
+            for kind, _, bucket_allowed, _ in verdicts:
+                if not bucket_allowed:
+                    RATE_LIMITED_TOTAL.inc(scope["path"], kind)
+            body = b'{"detail":"Too many requests"}'
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    *headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+
+        await self.app(scope, app_receive, send_wrapper)
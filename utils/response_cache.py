@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+from fastapi import Request, Response
+from utils.cache import TTLCache
+from utils.responses import OrjsonResponse
+from utils.metrics import RESPONSE_CACHE_TOTAL
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+# Per-user version counters, shared by the workers on a host
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", "response_cache.sqlite3")
+
+
+class CachedResponse:
+    __slots__ = ("version", "etag", "body")
+
+    def __init__(self, version: int, etag: str, body: bytes):
+        self.version = version
+        self.etag = etag
+        self.body = body
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in header.split(","))
+
+
+class ResponseCache:
+    """
+    Serialized per-user JSON responses with strong ETags.
+
+    Entries are keyed by user id plus request path and query string, and
+    tagged with the user's version counter. Any write affecting the user
+    bumps the counter, which makes all their entries stale at once.
+    A request whose If-None-Match matches a current entry gets a 304
+    without any Appwrite reads.
+
+    Entries are per worker; the counters live in a SQLite file shared by
+    the workers on a host, so a write through any worker invalidates every
+    worker's copy. Until start() (or if the file can't be read) nothing is
+    served from the cache.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, path: str):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.path = path
+        self._db: sqlite3.Connection | None = None
+
+    async def start(self):
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS versions (user_id TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+
+    async def stop(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def version(self, user_id: str) -> int:
+        """
+        Current version for `user_id`, or -1 (never cached) without the store.
+        """
+        if self._db is None:
+            return -1
+        try:
+            row = self._db.execute("SELECT version FROM versions WHERE user_id = ?", (user_id,)).fetchone()
+        except sqlite3.Error as e:
+            print("RESPONSE CACHE ERROR:", e)
+            return -1
+        return row[0] if row else 0
+
+    def bump(self, user_id: str | None):
+        if not user_id or self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT INTO versions (user_id, version) VALUES (?, 1)"
+                " ON CONFLICT (user_id) DO UPDATE SET version = version + 1",
+                (user_id,)
+            )
+        except sqlite3.Error as e:
+            print("RESPONSE CACHE ERROR:", e)
+
+    @staticmethod
+    def _key(request: Request, user_id: str) -> tuple:
+        return user_id, request.url.path, request.url.query
+
+    def _respond(self, request: Request, entry: CachedResponse, outcome: str) -> Response:
+        headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request, entry.etag):
+            RESPONSE_CACHE_TOTAL.inc("not_modified")
+            return Response(status_code=304, headers=headers)
+
+        RESPONSE_CACHE_TOTAL.inc(outcome)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def lookup(self, request: Request, user_id: str) -> Response | None:
+        """
+        304 or cached 200 for this user and request, or None if it must be rebuilt.
+        """
+        entry = self.entries.get(self._key(request, user_id))
+        if entry is None or entry.version < 0 or entry.version != self.version(user_id):
+            return None
+        return self._respond(request, entry, "hit")
+
+    def store(self, request: Request, user_id: str, version: int, content: dict) -> Response:
+        """
+        Cache `content`, built while the user was at `version`, and answer with it.
+        If a write bumped the version meanwhile, the entry is simply never served.
+        """
+        body = OrjsonResponse(content).body
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        entry = CachedResponse(version, etag, body)
+        self.entries.set(self._key(request, user_id), entry)
+        return self._respond(request, entry, "miss")
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_PATH)
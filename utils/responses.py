@@ -0,0 +1,15 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSON response rendered by orjson.
+
+    Return it directly from a route (instead of a dict) to also skip
+    FastAPI's jsonable_encoder pass, which walks every nested value and is
+    the bulk of the cost for order lists with full `items` arrays.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
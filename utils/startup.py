@@ -0,0 +1,42 @@
+import os
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """
+    Records how long each startup phase (imports, lifespan steps) takes,
+    so cold starts can be broken down from the logs and /health.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ready_at: float | None = None
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def breakdown(self) -> dict:
+        end = self.ready_at or time.perf_counter()
+        return {
+            "phasesMs": {name: round(seconds * 1000, 1) for name, seconds in self.phases},
+            "totalMs": round((end - self.started) * 1000, 1),
+        }
+
+    def log(self, label: str):
+        """
+        Print the breakdown; the first call also fixes the total startup time.
+        """
+        self.ready_at = self.ready_at or time.perf_counter()
+        summary = self.breakdown()
+        phases = ", ".join(f"{name} {ms}ms" for name, ms in summary["phasesMs"].items())
+        print(f"STARTUP [{label} pid={os.getpid()}]: {summary['totalMs']}ms ({phases})")
+
+
+startup_timer = StartupTimer()